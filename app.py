@@ -1,20 +1,31 @@
+import time
+
 import streamlit as st
 from input_widgets import numeric_input
 import pandas as pd
+import dbs  # lazy: torch / 모델은 실제로 쓸 때 처음 로드됨
+from app_jobs import get_job_queue
+from app_resources import load_scorer, render_health_panel, request_load, start_warm_up
 
 st.set_page_config(page_title="Diabetes Risk Tool", layout="wide")
+start_warm_up()  # 서버 프로세스당 한 번: 모델 / bounds / retriever를 background에서 미리 로드
 
 # --------------------
-# 0. 추천 텍스트를 만드는 함수 (나중에 친구 모델로 교체하면 됨)
+# 0. 모델 입력 / 점수 helper (추천 생성은 app_jobs의 background job)
 # --------------------
-def get_recommendation(features: dict) -> str:
-    input_dict=build_features_from_session()
-    text=service(input_dict)
+def to_model_input(features: dict) -> dict:
+    """세션 features -> 모델 입력 dict (34개 변수는 None -> 0.0, 나머지 키는 그대로)"""
+    model_input = dict(features)
+    model_input["hb1ac"] = features.get("h3a1c", 0.0)  # 앱은 h3a1c 키 사용
+    for k in dbs.FEATURE_NAMES:
+        model_input[k] = model_input.get(k) or 0.0
+    return model_input
 
-    # 지금은 placeholder 텍스트만 넣어둠
-    return (
-        text
-    )
+
+def score_features(features: dict) -> float:
+    """세션 features -> 현재 DBS risk score (0~100)"""
+    state = dbs.state_from_dict(to_model_input(features))
+    return float(load_scorer().score(state)[0])
 
 # --------------------
 # 1. Session state 초기화
@@ -33,6 +44,8 @@ if "context" not in st.session_state:
     st.session_state.context = ""
 if "recommendation" not in st.session_state:
     st.session_state.recommendation = None
+if "job_id" not in st.session_state:
+    st.session_state.job_id = None
 
 # --------------------
 # 2. 스텝 정의 (마지막 2개: review, output)
@@ -354,6 +367,8 @@ with left_col:
         else:
             st.markdown(f"- {label}")
 
+    render_health_panel()
+
 with right_col:
     step_id, step_label = STEPS[st.session_state.current_step]
     st.header(step_label)
@@ -646,6 +661,19 @@ with right_col:
         display_features = build_display_features_from_session()
         df_preview = pd.DataFrame([display_features])
         st.dataframe(df_preview)
+        # scorer가 warm-up 중이면 기다리지 않고 placeholder (다음 rerun에 점수 표시), 실패했으면 background에서 다시 로드
+        scorer_state = request_load("scorer")
+        if scorer_state == "warm":
+            st.metric(
+                "Current DBS risk score",
+                f"{score_features(build_features_from_session()):.1f}",
+            )
+        else:
+            st.metric("Current DBS risk score", "—")
+            if scorer_state == "error":
+                st.caption("Scoring model failed to load (see System health); retrying in the background.")
+            else:
+                st.caption("Scoring model is still loading; the score will appear shortly.")
 
         st.subheader("Patient contextual information (optional)")
         context_text = st.text_area(
@@ -660,9 +688,9 @@ with right_col:
             "based on these features."
         )
         if st.button("🚀 Generate lifestyle recommendation", use_container_width=True):
-            features = build_features_from_session()
-            rec_text = get_recommendation(features)
-            st.session_state.recommendation = rec_text
+            # 생성은 background worker에서 (버튼에서 기다리지 않게), output 페이지가 job을 polling
+            st.session_state.recommendation = None
+            st.session_state.job_id = get_job_queue().submit(to_model_input(build_features_from_session()))
             # output 페이지로 이동
             st.session_state.current_step += 1
             st.rerun()
@@ -670,12 +698,32 @@ with right_col:
     elif step_id == "output":
         st.subheader("Lifestyle Recommendation")
 
-        if st.session_state.recommendation is None:
+        poll = False
+        job = get_job_queue().get(st.session_state.job_id) if st.session_state.job_id else None
+        if st.session_state.recommendation is None and job is not None:
+            if job["status"] == "done":
+                st.session_state.recommendation = job["result"]["recommendation"]
+            elif job["status"] == "error":
+                st.error(f"Recommendation failed: {job['error']}")
+            else:
+                # 진행 중: evidence는 retrieval 끝나자마자, 추천 텍스트는 생성되는 대로
+                poll = True
+                stage = job["stage"] or "queued"
+                st.info(f"⏳ Generating recommendation ({stage})...")
+                progress = job["progress"]
+                if progress.get("text"):
+                    st.markdown(progress["text"] + " ▌")
+                if progress.get("evidence"):
+                    st.markdown("---")
+                    st.subheader("Evidence used (ADA guideline chunks)")
+                    st.text(progress["evidence"])
+
+        if st.session_state.recommendation is not None:
+            st.markdown(st.session_state.recommendation)
+        elif not poll and (job is None or job["status"] != "error"):
             st.warning(
                 "No recommendation yet. Please go back to the Review step and generate it."
             )
-        else:
-            st.markdown(st.session_state.recommendation)
 
         st.markdown("---")
         st.subheader("Context you provided")
@@ -690,6 +738,10 @@ with right_col:
             st.session_state.current_step = 0
             st.rerun()
 
+        if poll:
+            time.sleep(1.0)
+            st.rerun()
+
     # --------------------
     # 네비게이션 버튼 (review / output 제외)
     # --------------------
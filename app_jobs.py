@@ -0,0 +1,197 @@
+# app_jobs.py
+"""
+Background job queue for recommendation generation (app.py).
+
+Generate 버튼은 job을 넣고 job id만 st.session_state에 저장한다. 실제 RL rollout + retrieval + LLM은
+로컬 worker thread pool에서 돌고, 진행 상황(stage, evidence, 생성 중인 텍스트)은 SQLite job table에 기록된다.
+output 스텝은 이 table을 polling 해서 보여준다 -> 느린 LLM이 Streamlit server thread를 잡고 있지 않음.
+
+    queued -> running (stage: planning / retrieving / generating) -> done | error
+
+여러 Streamlit process가 같은 JOB_DB_PATH를 써도 되게, job마다 owner(process uuid)와 heartbeat를 기록한다.
+owner process가 죽어서 heartbeat가 JOB_HEARTBEAT_TIMEOUT 넘게 멈춘 queued / running job만 error로 정리.
+"""
+import json
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Optional
+
+JOB_DB_PATH = os.getenv("JOB_DB_PATH", os.path.join(".jobs", "jobs.sqlite"))
+JOB_WORKERS = int(os.getenv("JOB_WORKERS", "4"))
+JOB_TTL = float(os.getenv("JOB_TTL", str(24 * 3600)))  # 끝난 job을 지우기까지 (seconds)
+PROGRESS_INTERVAL = 0.3  # 생성 중인 텍스트를 table에 쓰는 최소 간격 (seconds)
+JOB_HEARTBEAT_INTERVAL = float(os.getenv("JOB_HEARTBEAT_INTERVAL", "5"))   # owner process가 자기 job을 갱신하는 간격
+JOB_HEARTBEAT_TIMEOUT = float(os.getenv("JOB_HEARTBEAT_TIMEOUT", "60"))    # 이만큼 갱신이 없으면 owner가 죽은 것으로 봄
+
+Handler = Callable[[Dict[str, Any], Callable[..., None]], Dict[str, Any]]
+
+
+class JobQueue:
+    def __init__(self, handler: Handler, path: str = JOB_DB_PATH, workers: int = JOB_WORKERS):
+        self.handler = handler
+        self.path = path
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+
+        self.owner = uuid.uuid4().hex   # 이 process가 넣은 job 표시
+
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, check_same_thread=False, timeout=30)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS jobs ("
+            " id TEXT PRIMARY KEY, status TEXT NOT NULL, stage TEXT,"
+            " payload TEXT NOT NULL, progress TEXT, result TEXT, error TEXT,"
+            " created REAL NOT NULL, started REAL, finished REAL,"
+            " owner TEXT, heartbeat REAL)"
+        )
+        columns = {row[1] for row in self._db.execute("PRAGMA table_info(jobs)")}
+        for column, kind in (("owner", "TEXT"), ("heartbeat", "REAL")):
+            if column not in columns:   # 예전 버전이 만든 table
+                self._db.execute(f"ALTER TABLE jobs ADD COLUMN {column} {kind}")
+        self._db.commit()
+        self._reap_stale()
+
+        self._pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="job-worker")
+        threading.Thread(target=self._heartbeat_loop, name="job-heartbeat", daemon=True).start()
+
+    def _execute(self, sql: str, args: tuple = ()):
+        with self._lock:
+            self._db.execute(sql, args)
+            self._db.commit()
+
+    # ----------------- owner / heartbeat -----------------
+    def _reap_stale(self):
+        """owner process가 죽은 (heartbeat가 멈춘) queued / running job -> error. 다른 살아있는 process의 job은 건드리지 않음"""
+        now = time.time()
+        self._execute(
+            "UPDATE jobs SET status = 'error', error = 'interrupted: worker process stopped', finished = ?"
+            " WHERE status IN ('queued', 'running') AND owner IS NOT ? AND COALESCE(heartbeat, created) < ?",
+            (now, self.owner, now - JOB_HEARTBEAT_TIMEOUT),
+        )
+
+    def _heartbeat_loop(self):
+        while True:
+            time.sleep(JOB_HEARTBEAT_INTERVAL)
+            try:
+                self._execute(
+                    "UPDATE jobs SET heartbeat = ? WHERE owner = ? AND status IN ('queued', 'running')",
+                    (time.time(), self.owner),
+                )
+            except sqlite3.Error as e:
+                print(f"Job heartbeat failed ({type(e).__name__}: {e})")
+
+    # ----------------- public API -----------------
+    def submit(self, payload: Dict[str, Any]) -> str:
+        job_id = uuid.uuid4().hex
+        now = time.time()
+        self._execute("DELETE FROM jobs WHERE finished IS NOT NULL AND finished < ?", (now - JOB_TTL,))
+        self._reap_stale()
+        self._execute(
+            "INSERT INTO jobs (id, status, payload, created, owner, heartbeat) VALUES (?, 'queued', ?, ?, ?, ?)",
+            (job_id, json.dumps(payload), now, self.owner, now),
+        )
+        self._pool.submit(self._run, job_id, payload)
+        return job_id
+
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            row = self._db.execute(
+                "SELECT status, stage, progress, result, error, created, started, finished FROM jobs WHERE id = ?",
+                (job_id,),
+            ).fetchone()
+        if row is None:
+            return None
+        status, stage, progress, result, error, created, started, finished = row
+        return {
+            "id": job_id,
+            "status": status,
+            "stage": stage,
+            "progress": json.loads(progress) if progress else {},
+            "result": json.loads(result) if result else None,
+            "error": error,
+            "created": created,
+            "started": started,
+            "finished": finished,
+        }
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            rows = self._db.execute("SELECT status, COUNT(*) FROM jobs GROUP BY status").fetchall()
+        return {status: n for status, n in rows}
+
+    # ----------------- worker -----------------
+    def _run(self, job_id: str, payload: Dict[str, Any]):
+        self._execute("UPDATE jobs SET status = 'running', started = ? WHERE id = ?", (time.time(), job_id))
+        progress: Dict[str, Any] = {}
+
+        def update(stage: Optional[str] = None, **fields: Any):
+            progress.update(fields)
+            if stage is not None:
+                self._execute(
+                    "UPDATE jobs SET stage = ?, progress = ? WHERE id = ?", (stage, json.dumps(progress), job_id)
+                )
+            else:
+                self._execute("UPDATE jobs SET progress = ? WHERE id = ?", (json.dumps(progress), job_id))
+
+        try:
+            result = self.handler(payload, update)
+        except Exception as e:
+            self._execute(
+                "UPDATE jobs SET status = 'error', error = ?, finished = ? WHERE id = ?",
+                (f"{type(e).__name__}: {e}", time.time(), job_id),
+            )
+            return
+        self._execute(
+            "UPDATE jobs SET status = 'done', stage = 'done', result = ?, finished = ? WHERE id = ?",
+            (json.dumps(result), time.time(), job_id),
+        )
+
+
+def run_recommendation_job(model_input: Dict[str, Any], update: Callable[..., None]) -> Dict[str, Any]:
+    """model input dict (34 features + context) -> RL plan -> evidence -> streamed LLM text"""
+    import dbs
+    from main import format_evidence, format_recommendation, stream_llm_recommendation
+
+    update(stage="planning")
+    env = dbs.PatientEnv(max_steps=8, col_minmax=dbs.get_col_minmax())
+    rl_output = dbs.test_patient(env, dbs.get_actor(), model_input, max_steps=8)
+
+    update(stage="retrieving")
+    evidence_blocks, tokens = stream_llm_recommendation(rl_output)
+    evidence = format_evidence(evidence_blocks)
+
+    update(stage="generating", evidence=evidence, text="")
+    parts = []
+    last = time.perf_counter()
+    for tok in tokens:
+        parts.append(tok)
+        if time.perf_counter() - last >= PROGRESS_INTERVAL:
+            update(text="".join(parts))
+            last = time.perf_counter()
+
+    final_output = "".join(parts)
+    return {
+        "recommendation": format_recommendation(final_output, evidence_blocks),
+        "text": final_output,
+        "evidence": evidence,
+        "old_score": float(rl_output["old_score"]),
+        "new_score": float(rl_output["new_score"]),
+    }
+
+
+_queue: Optional[JobQueue] = None
+_queue_lock = threading.Lock()
+
+
+def get_job_queue() -> JobQueue:
+    """프로세스 전역 recommendation JobQueue (JOB_DB_PATH, JOB_WORKERS)"""
+    global _queue
+    if _queue is None:
+        with _queue_lock:
+            if _queue is None:
+                _queue = JobQueue(run_recommendation_job)
+    return _queue
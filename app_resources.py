@@ -0,0 +1,154 @@
+# app_resources.py
+"""
+app.py용 resource layer: 서버 프로세스당 한 번만 로드해서 모든 session / rerun이 같이 쓴다.
+
+- scorer (TotalModel): review step의 점수, 상태 / 로드 시간을 health panel에 표시
+- 추천 job (app_jobs)이 쓰는 bounds / actor / retriever도 앱이 처음 뜰 때 background thread에서 미리 로드
+  (warm-up) -> 첫 Generate 클릭이 cold start를 안 기다림
+- health(): resource가 warm / loading / cold / error 인지 + 로드 시간
+"""
+import threading
+import time
+from typing import Any, Callable, Dict, List
+
+import streamlit as st
+
+import dbs
+
+RESOURCE_NAMES = ["scorer"]
+
+_status: Dict[str, Dict[str, Any]] = {name: {"state": "cold"} for name in RESOURCE_NAMES}
+_status_lock = threading.Lock()
+
+
+def _load(name: str, loader: Callable[[], Any]) -> Any:
+    """loader 실행 + 상태 / 시간 기록 (loader들은 dbs / rag의 thread-safe singleton이라 두 번 불려도 같은 객체)"""
+    with _status_lock:
+        first = _status[name]["state"] in ("cold", "error")
+        if first:
+            _status[name] = {"state": "loading"}
+    t0 = time.perf_counter()
+    try:
+        obj = loader()
+    except Exception as e:
+        with _status_lock:
+            _status[name] = {"state": "error", "error": f"{type(e).__name__}: {e}"}
+        raise
+    if first:
+        with _status_lock:
+            _status[name] = {"state": "warm", "load_ms": (time.perf_counter() - t0) * 1000}
+    return obj
+
+
+def _get_retriever():
+    from rag.resources import get_rag_resources  # openai / chromadb는 여기서 처음 import
+
+    resources = get_rag_resources()
+    if resources.retrieval_backend == "chroma":
+        resources.collection
+    else:
+        resources.index
+    return resources
+
+
+# lambda: dbs의 lazy import (torch 등)도 로드 시간에 포함되게
+LOADERS: Dict[str, Callable[[], Any]] = {
+    "scorer": lambda: dbs.get_scorer(),
+}
+
+# app_jobs.run_recommendation_job이 쓰는 singleton들 (health panel에는 없음)
+JOB_WARM_UP: List[Callable[[], Any]] = [
+    lambda: dbs.get_col_minmax(),
+    lambda: dbs.get_actor(),
+    _get_retriever,
+]
+
+
+def _try_load(name: str):
+    try:
+        _load(name, LOADERS[name])
+    except Exception:
+        pass  # health panel에 error로 표시, 다음에 request_load() 할 때 다시 시도
+
+
+def _warm_up():
+    for name in LOADERS:
+        _try_load(name)
+    for loader in JOB_WARM_UP:
+        try:
+            loader()
+        except Exception:
+            pass  # job이 실행될 때 다시 로드 (실패하면 job error로 표시)
+
+
+@st.cache_resource
+def start_warm_up() -> threading.Thread:
+    # 서버 프로세스당 한 번
+    thread = threading.Thread(target=_warm_up, name="app-warm-up", daemon=True)
+    thread.start()
+    return thread
+
+
+@st.cache_resource
+def load_scorer():
+    # 서버 프로세스당 한 번만 가중치 로드
+    return _load("scorer", LOADERS["scorer"])
+
+
+def resource_state(name: str) -> str:
+    """warm / loading / cold / error (UI가 script thread에서 로드를 기다리지 않고 placeholder를 보여줄 때)"""
+    with _status_lock:
+        return _status[name]["state"]
+
+
+def request_load(name: str) -> str:
+    """
+    지금 상태를 돌려주고, cold / error면 background thread에서 (다시) 로드를 시작한다.
+    UI는 기다리지 않고 placeholder를 보여주다가 다음 rerun에 warm이면 사용.
+    """
+    state = resource_state(name)
+    if state in ("cold", "error"):
+        threading.Thread(target=_try_load, args=(name,), name=f"app-load-{name}", daemon=True).start()
+    return state
+
+
+def health() -> List[Dict[str, Any]]:
+    with _status_lock:
+        rows = [{"name": name, **_status[name]} for name in RESOURCE_NAMES]
+    if rows[RESOURCE_NAMES.index("scorer")]["state"] == "warm":
+        stats = dbs.get_scorer().stats()
+        rows[RESOURCE_NAMES.index("scorer")]["detail"] = (
+            f"{stats['device']}, {stats['calls']} calls, {stats['mean_latency_ms']:.1f} ms mean"
+        )
+    return rows
+
+
+def render_health_panel():
+    icons = {"warm": "🟢", "loading": "🟡", "cold": "⚪", "error": "🔴"}
+    with st.expander("🩺 System health", expanded=False):
+        for row in health():
+            line = f"{icons[row['state']]} **{row['name']}**: {row['state']}"
+            if "load_ms" in row:
+                line += f" (loaded in {row['load_ms']:.0f} ms)"
+            if "detail" in row:
+                line += f", {row['detail']}"
+            st.markdown(line)
+            if "error" in row:
+                st.caption(row["error"])
+
+        from app_jobs import get_job_queue
+
+        jobs = get_job_queue().stats()
+        st.markdown(
+            f"📋 **jobs**: {jobs.get('queued', 0)} queued, {jobs.get('running', 0)} running, "
+            f"{jobs.get('done', 0)} done, {jobs.get('error', 0)} failed"
+        )
+
+        from rag.embedding_cache import get_embedding_cache
+
+        cache = get_embedding_cache().stats()
+        st.markdown(
+            f"🧠 **embedding cache**: {cache['entries']} / {cache['max_entries']} entries, "
+            f"{cache['hit_rate']:.0%} hit rate ({cache['hits']} hits, {cache['misses']} misses), "
+            f"{cache['evictions']} evictions"
+        )
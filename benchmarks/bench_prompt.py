@@ -0,0 +1,63 @@
+"""
+Prompt size: previous prompt (clinical JSON string + every action's raw chunks) vs token-budgeted, deduplicated prompt.
+
+오프라인 (hashing embedding backend + in-memory index, LLM 호출 없음), main.result 환자 기준.
+
+    python benchmarks/bench_prompt.py [--budget 6000 4000 2500]
+"""
+import argparse
+import json
+import os
+import sys
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT_DIR)
+os.chdir(ROOT_DIR)
+
+import main  # noqa: E402
+import rag.prompt  # noqa: E402
+from rag.embeddings import HashingEmbeddingFunction  # noqa: E402
+from rag.index import get_or_build_index  # noqa: E402
+from rag.prompt import count_tokens  # noqa: E402
+
+
+def previous_prompt_tokens(clinical, context, rl_actions, evidence_blocks, system_prompt) -> int:
+    user_prompt = {
+        "clinical_info": clinical,
+        "patient_context": context,
+        "rl_actions": rl_actions,
+        "evidence": [{k: v for k, v in b.items() if k != "chunks"} for b in evidence_blocks],
+        "task": "",
+    }
+    return count_tokens(system_prompt) + count_tokens(json.dumps(user_prompt))
+
+
+def main_():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--budget", type=int, nargs="+", default=[6000, 4000, 2500])
+    args = parser.parse_args()
+
+    emb = HashingEmbeddingFunction()
+    index = get_or_build_index(emb)
+    clinical, context, rl_actions, blocks = main.prepare_recommendation(dict(main.result))
+    main.attach_evidence(blocks, index.query_chunks_batch(blocks, emb))
+
+    ids = [cid for b in blocks for cid, _ in b["chunks"]]
+    print(f"{len(blocks)} actions, {len(ids)} retrieved chunks, {len(set(ids))} unique")
+
+    messages = main.build_llm_messages(clinical, context, rl_actions, blocks)
+    system_prompt = messages[0]["content"]
+    task_tokens = count_tokens(json.loads(messages[1]["content"])["task"])
+    print(f"previous prompt:         {previous_prompt_tokens(clinical, context, rl_actions, blocks, system_prompt) + task_tokens:6d} tokens")
+
+    for budget in args.budget:
+        rag.prompt.PROMPT_TOKEN_BUDGET = budget
+        main.PROMPT_TOKEN_BUDGET = budget
+        messages = main.build_llm_messages(clinical, context, rl_actions, blocks)
+        user = json.loads(messages[1]["content"])
+        total = sum(count_tokens(m["content"]) for m in messages)
+        print(f"budget {budget:5d}:            {total:6d} tokens, {len(user['evidence_chunks'])} evidence chunks")
+
+
+if __name__ == "__main__":
+    main_()
@@ -0,0 +1,99 @@
+"""
+Retrieval latency: Chroma PersistentClient vs in-process InMemoryIndex.
+
+오프라인으로 돌리기 위해 hashing embedding backend를 쓰고, query embedding은 미리 계산해서
+순수 retrieval 시간만 잰다 (한 요청 = get_llm_recommendation의 8개 action).
+
+    python benchmarks/bench_retrieval.py [--repeat 200]
+"""
+import argparse
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT_DIR)
+os.chdir(ROOT_DIR)
+
+import chromadb  # noqa: E402
+
+from rag.corpus import load_chunks  # noqa: E402
+from rag.embeddings import HashingEmbeddingFunction  # noqa: E402
+from rag.index import InMemoryIndex  # noqa: E402
+from rag.vectorstore import ChromaEmbeddingFunction  # noqa: E402
+
+REQUESTS = [
+    {"domain": d, "population": "adults", "query": f"ADA guideline for {v}, lifestyle change, diabetes, feasibility"}
+    for v, d in [
+        ("mvpa", "behaviors"), ("sleep_hours", "behaviors"), ("alcohol", "behaviors"), ("smoking", "behaviors"),
+        ("bmi", "obesity"), ("waist", "obesity"), ("sbp", "behaviors"), ("hb1ac", "behaviors"),
+    ]
+]
+
+
+def where_for(domain, population):
+    conds = [{"domain": {"$eq": domain}}, {"population": {"$eq": population}}]
+    return {"$and": conds}
+
+
+def report(name, times):
+    times = sorted(times)
+    p99 = times[min(len(times) - 1, int(len(times) * 0.99))]
+    print(f"{name:24s} p50 {statistics.median(times) * 1000:8.3f}ms  p99 {p99 * 1000:8.3f}ms")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--repeat", type=int, default=200)
+    args = parser.parse_args()
+
+    emb = HashingEmbeddingFunction()
+    ids, docs, metas = load_chunks(verbose=False)
+    qvecs = emb.embed([r["query"] for r in REQUESTS])
+
+    with tempfile.TemporaryDirectory() as tmp:
+        client = chromadb.PersistentClient(path=os.path.join(tmp, "chroma"))
+        col = client.create_collection(name="bench", embedding_function=ChromaEmbeddingFunction(emb))
+        col.add(ids=ids, documents=docs, metadatas=metas, embeddings=emb.embed(docs))
+
+        index = InMemoryIndex.build(emb, ids, docs, metas)
+        index.save(os.path.join(tmp, "index"))
+        index = InMemoryIndex.load(os.path.join(tmp, "index"))
+        print(f"{len(ids)} chunks, {len(index.partitions)} partitions, {args.repeat} requests x {len(REQUESTS)} actions")
+
+        chroma_times, memory_times, hybrid_times = [], [], []
+        for _ in range(args.repeat):
+            t0 = time.perf_counter()
+            for r, v in zip(REQUESTS, qvecs):
+                col.query(query_embeddings=[v], n_results=4, where=where_for(r["domain"], r["population"]))
+            chroma_times.append(time.perf_counter() - t0)
+
+            t0 = time.perf_counter()
+            for r, v in zip(REQUESTS, qvecs):
+                index.search([v], r["domain"], r["population"], k=4)
+            memory_times.append(time.perf_counter() - t0)
+
+            t0 = time.perf_counter()
+            for r, v in zip(REQUESTS, qvecs):
+                index.search([v], r["domain"], r["population"], k=4, query_texts=[r["query"]], alpha=0.5)
+            hybrid_times.append(time.perf_counter() - t0)
+
+        report("chroma", chroma_times)
+        report("in-memory index", memory_times)
+        report("in-memory hybrid BM25", hybrid_times)
+
+        # top-k 품질 비교: in-memory index는 exact search, chroma는 HNSW (approximate)
+        # chroma 기본 거리 = squared L2, normalized vector면 cosine = 1 - d / 2
+        # (zero vector chunk는 chroma에서 거리 1.0 = cosine 0.5로 잡혀서 제외)
+        at_least = 0
+        for r, v in zip(REQUESTS, qvecs):
+            res = col.query(query_embeddings=[v], n_results=4, where=where_for(r["domain"], r["population"]))
+            chroma_scores = [1 - d / 2 for d, doc in zip(res["distances"][0], res["documents"][0]) if emb.embed_one(doc).any()]
+            memory_scores = [s for _, s in index.search([v], r["domain"], r["population"], k=4)[0]]
+            at_least += sum(memory_scores) >= sum(chroma_scores[:len(memory_scores)]) - 1e-4
+        print(f"in-memory top-4 cosine >= chroma: {at_least}/{len(REQUESTS)} requests")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,101 @@
+"""
+Single-patient scoring under concurrency: unbatched ScoringService.score vs MicroBatcher.
+
+client thread C개가 각자 환자 한 명([1,34]) score 요청을 연속으로 보낸다 (service /score와 같은 형태).
+
+    python benchmarks/bench_scoring.py [--clients 1 8 32] [--requests 300] [--max-batch 64] [--max-wait-ms 0 0.5 2]
+"""
+import argparse
+import os
+import statistics
+import sys
+import threading
+import time
+from typing import Callable, List
+
+import numpy as np
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT_DIR)
+os.chdir(ROOT_DIR)
+
+import torch  # noqa: E402
+
+from dbs.features import NUM_FEATURES  # noqa: E402
+from dbs.microbatch import MicroBatcher  # noqa: E402
+from dbs.scorer import get_scorer  # noqa: E402
+
+
+def run_clients(score: Callable, states: np.ndarray, clients: int, requests: int):
+    """client마다 requests번 -> (요청별 latency 목록, 전체 wall time)"""
+    latencies: List[List[float]] = [[] for _ in range(clients)]
+    barrier = threading.Barrier(clients + 1)
+
+    def client(c: int):
+        barrier.wait()
+        for r in range(requests):
+            x = states[(c * requests + r) % len(states)]
+            t0 = time.perf_counter()
+            score(x)
+            latencies[c].append(time.perf_counter() - t0)
+
+    threads = [threading.Thread(target=client, args=(c,)) for c in range(clients)]
+    for t in threads:
+        t.start()
+    barrier.wait()
+    t0 = time.perf_counter()
+    for t in threads:
+        t.join()
+    return [dt for lat in latencies for dt in lat], time.perf_counter() - t0
+
+
+def report(name: str, times: List[float], wall: float):
+    times = sorted(times)
+    p99 = times[min(len(times) - 1, int(len(times) * 0.99))]
+    print(
+        f"{name:28s} p50 {statistics.median(times) * 1000:7.3f}ms  p99 {p99 * 1000:7.3f}ms"
+        f"  {len(times) / wall:8.0f} req/s"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--clients", type=int, nargs="+", default=[1, 8, 32])
+    parser.add_argument("--requests", type=int, default=300, help="requests per client")
+    parser.add_argument("--max-batch", type=int, default=64)
+    parser.add_argument("--max-wait-ms", type=float, nargs="+", default=[0.0, 2.0])
+    parser.add_argument("--threads", type=int, default=None, help="torch intra-op threads")
+    args = parser.parse_args()
+
+    if args.threads:
+        torch.set_num_threads(args.threads)
+    rng = np.random.default_rng(0)
+    states = rng.normal(size=(4096, NUM_FEATURES)).astype(np.float32)
+
+    scorer = get_scorer()
+    batchers = [MicroBatcher(scorer, max_batch=args.max_batch, max_wait_ms=w) for w in args.max_wait_ms]
+    for _ in range(20):   # warm-up
+        scorer.score(states[0])
+        for batcher in batchers:
+            batcher.score(states[0])
+
+    print(f"device {scorer.device}, torch threads {torch.get_num_threads()}, max_batch {args.max_batch}")
+    for clients in args.clients:
+        times, wall = run_clients(scorer.score, states, clients, args.requests)
+        report(f"{clients:3d} clients  unbatched", times, wall)
+
+        for batcher in batchers:
+            before = batcher.stats()
+            times, wall = run_clients(batcher.score, states, clients, args.requests)
+            after = batcher.stats()
+            report(f"{clients:3d} clients  wait {batcher.max_wait * 1000:g}ms", times, wall)
+            batches = after["batches"] - before["batches"]
+            print(f"{'':28s} {(after['rows'] - before['rows']) / batches:.1f} rows / forward")
+
+        # 결과가 unbatched와 같은지
+        x = states[:clients]
+        assert np.allclose(scorer.score(x), np.concatenate([batchers[0].score(r) for r in x]), atol=1e-4)
+
+
+if __name__ == "__main__":
+    main()
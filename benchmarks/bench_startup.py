@@ -0,0 +1,57 @@
+"""
+Startup-time benchmark: fresh interpreter per sample, wall time until the snippet finishes.
+
+    python benchmarks/bench_startup.py [--repeat 5]
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+CASES = [
+    ("python (baseline)", "pass"),
+    ("import dbs", "import dbs"),
+    ("dbs.load_col_minmax()", "import dbs; dbs.load_col_minmax()"),
+    ("import dbs.scorer (torch)", "import dbs.scorer"),
+    ("first score", "import dbs; dbs.get_scorer().score([0.0] * 34)"),
+    ("first plan", "import dbs, patient_demo as p; dbs.plan_patient({**p.DEMO_FEATURES, 'hb1ac': p.DEMO_FEATURES['h3a1c']})"),
+    ("import pypractice", "import pypractice"),
+    ("import main", "import main"),
+]
+
+
+def time_snippet(code: str) -> float:
+    t0 = time.perf_counter()
+    proc = subprocess.run(
+        [sys.executable, "-c", code],
+        cwd=ROOT_DIR,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.PIPE,
+    )
+    dt = time.perf_counter() - t0
+    if proc.returncode != 0:
+        raise RuntimeError(proc.stderr.decode(errors="replace").strip().splitlines()[-1])
+    return dt
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    print(f"{'case':32s} {'median':>10s} {'min':>10s}")
+    for name, code in CASES:
+        try:
+            times = [time_snippet(code) for _ in range(args.repeat)]
+        except RuntimeError as e:
+            print(f"{name:32s} skipped ({e})")
+            continue
+        print(f"{name:32s} {statistics.median(times) * 1000:8.1f}ms {min(times) * 1000:8.1f}ms")
+
+
+if __name__ == "__main__":
+    main()
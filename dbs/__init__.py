@@ -0,0 +1,50 @@
+"""
+DBS scoring / RL planning core shared by pypractice.py, the Streamlit app and batch jobs.
+
+`import dbs` does not import torch or load any model. Names below are resolved
+on first attribute access, so callers only pay for what they use:
+
+    import dbs
+    dbs.get_scorer().score(batch)      # loads TotalModel on first call
+    dbs.plan_patient(patient_dict)     # loads HybridActor + bounds on first call
+"""
+import importlib
+
+_LAZY = {
+    "FEATURE_NAMES": "dbs.features",
+    "NUM_FEATURES": "dbs.features",
+    "state_from_dict": "dbs.features",
+    "load_col_minmax": "dbs.bounds",
+    "load_clip_bounds": "dbs.bounds",
+    "TotalModel": "dbs.models",
+    "HybridActor": "dbs.models",
+    "HybridCritic": "dbs.models",
+    "ScoringService": "dbs.scorer",
+    "get_scorer": "dbs.scorer",
+    "scoring": "dbs.scorer",
+    "MicroBatcher": "dbs.microbatch",
+    "get_score_batcher": "dbs.microbatch",
+    "PatientEnv": "dbs.env",
+    "VectorPatientEnv": "dbs.env",
+    "get_actor": "dbs.planner",
+    "get_col_minmax": "dbs.planner",
+    "test_patient": "dbs.planner",
+    "plan_patient": "dbs.planner",
+    "run_batch": "dbs.batch",
+    "load_runtime_model": "dbs.runtime",
+    "load_runtime_actor": "dbs.runtime",
+}
+
+__all__ = list(_LAZY)
+
+
+def __getattr__(name):
+    if name in _LAZY:
+        value = getattr(importlib.import_module(_LAZY[name]), name)
+        globals()[name] = value
+        return value
+    raise AttributeError(f"module 'dbs' has no attribute {name!r}")
+
+
+def __dir__():
+    return sorted(list(globals()) + __all__)
@@ -0,0 +1,219 @@
+"""
+Batch 8-week plans for a whole patient cohort.
+
+CSV / Parquet cohort (input.pkl과 같은 34개 컬럼)를 chunk 단위로 읽어서
+vectorized scoring + batched HybridActor rollout을 돌리고, 환자별 plan을 바로 파일에 쓴다.
+메모리는 chunk 크기만큼만 사용한다.
+
+    python -m dbs.batch cohort.csv plans.jsonl --chunk-size 4096
+"""
+import argparse
+import csv
+import json
+import os
+import time
+from typing import Any, Dict, Iterator, List, Optional
+
+import numpy as np
+import pandas as pd
+import torch
+
+from dbs.env import VectorPatientEnv
+from dbs.features import FEATURE_NAMES
+from dbs.planner import get_actor, get_col_minmax
+from dbs.scorer import get_scorer
+
+MAX_SKIPPED_IDS = 1000   # run_batch 결과에 남기는 skipped id 수 (개수는 전부 센다)
+
+
+def iter_cohort(path: str, chunk_size: int = 4096) -> Iterator[pd.DataFrame]:
+    """CSV / Parquet -> DataFrame chunk iterator"""
+    ext = os.path.splitext(path)[1].lower()
+    if ext in (".parquet", ".pq"):
+        try:
+            import pyarrow.parquet as pq
+        except ImportError as e:
+            raise RuntimeError("Reading Parquet cohorts requires pyarrow (pip install pyarrow).") from e
+        pf = pq.ParquetFile(path)
+        for rb in pf.iter_batches(batch_size=chunk_size):
+            yield rb.to_pandas()
+    elif ext == ".csv":
+        yield from pd.read_csv(path, chunksize=chunk_size)
+    else:
+        raise ValueError(f"Unsupported cohort format: {path} (expected .csv or .parquet)")
+
+
+def feature_matrix(df: pd.DataFrame) -> np.ndarray:
+    """chunk -> [N,34] float32 (빈 칸 / 숫자가 아닌 값은 NaN)"""
+    missing = [c for c in FEATURE_NAMES if c not in df.columns]
+    if missing:
+        raise KeyError(f"{missing} missing in cohort columns")
+    return df[FEATURE_NAMES].apply(pd.to_numeric, errors="coerce").to_numpy(dtype=np.float32)
+
+
+def plan_chunk(df: pd.DataFrame, env: VectorPatientEnv, actor, max_steps=8) -> Dict[str, np.ndarray]:
+    """
+    chunk 하나 -> old/new score [N], action_idx / delta [N, max_steps]
+    직접 부르는 쪽을 위한 guard: 빈 칸 / non-finite feature가 있으면 ValueError (run_batch는 미리 걸러서 plan_states를 부른다)
+    """
+    states = feature_matrix(df)
+    bad = np.flatnonzero(~np.isfinite(states).all(axis=1))
+    if len(bad):
+        raise ValueError(f"rows {df.index[bad].tolist()} have missing / non-finite features")
+    return plan_states(states, env, actor, max_steps=max_steps)
+
+
+def plan_states(states: np.ndarray, env: VectorPatientEnv, actor, max_steps=8) -> Dict[str, np.ndarray]:
+    """[N,34] finite float32 -> plan_chunk와 같은 결과"""
+    state = env.reset(states)
+    old_score = env.last_score
+
+    actions, deltas = [], []
+    with torch.no_grad():
+        for _ in range(max_steps):
+            action_idx, delta = actor.act(torch.from_numpy(state))
+            state, _, _ = env.step(action_idx, delta)
+            actions.append(action_idx.numpy())
+            deltas.append(delta.numpy())
+
+    return {
+        "old_score": old_score,
+        "new_score": env.last_score,
+        "action_idx": np.stack(actions, axis=1),
+        "delta": np.stack(deltas, axis=1),
+    }
+
+
+def plan_records(ids: List[Any], plans: Dict[str, np.ndarray]) -> Iterator[Dict[str, Any]]:
+    """plan_chunk 결과 -> test_patient와 같은 형태의 환자별 dict"""
+    for i, pid in enumerate(ids):
+        record: Dict[str, Any] = {"id": pid}
+        for step in range(plans["action_idx"].shape[1]):
+            record[f"{step + 1}week"] = (
+                FEATURE_NAMES[int(plans["action_idx"][i, step])],
+                float(plans["delta"][i, step]),
+            )
+        record["old_score"] = float(plans["old_score"][i])
+        record["new_score"] = float(plans["new_score"][i])
+        yield record
+
+
+class PlanWriter:
+    """
+    .jsonl 또는 .csv로 한 줄씩 기록.
+    <path>.tmp에 쓰고 정상 종료할 때만 path로 os.replace -> 실패한 run이 반쯤 쓴 plan 파일을 남기지 않는다
+    """
+
+    def __init__(self, path: str, max_steps=8):
+        self.path = path
+        self.tmp_path = path + ".tmp"
+        self.f = open(self.tmp_path, "w", encoding="utf-8", newline="")
+        self.csv = None
+        if path.lower().endswith(".csv"):
+            header = ["id"]
+            for step in range(1, max_steps + 1):
+                header += [f"{step}week_variable", f"{step}week_delta"]
+            header += ["old_score", "new_score"]
+            self.csv = csv.writer(self.f)
+            self.csv.writerow(header)
+
+    def write(self, record: Dict[str, Any]):
+        if self.csv is None:
+            self.f.write(json.dumps(record) + "\n")
+            return
+        row = [record["id"]]
+        step = 1
+        while f"{step}week" in record:
+            row += list(record[f"{step}week"])
+            step += 1
+        row += [record["old_score"], record["new_score"]]
+        self.csv.writerow(row)
+
+    def close(self):
+        self.f.close()
+        os.replace(self.tmp_path, self.path)
+
+    def discard(self):
+        self.f.close()
+        os.remove(self.tmp_path)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, *exc):
+        if exc_type is None:
+            self.close()
+        else:
+            self.discard()
+
+
+def run_batch(
+    cohort_path: str,
+    output_path: str,
+    chunk_size: int = 4096,
+    max_steps: int = 8,
+    id_col: Optional[str] = None,
+    seed: Optional[int] = None,
+) -> Dict[str, float]:
+    if seed is not None:
+        torch.manual_seed(seed)
+
+    actor = get_actor()
+    env = VectorPatientEnv(get_col_minmax(), scorer=get_scorer(), max_steps=max_steps)
+
+    t0 = time.perf_counter()
+    n = 0
+    planned = 0
+    skipped = 0
+    skipped_ids: List[Any] = []   # 처음 MAX_SKIPPED_IDS개만
+    with PlanWriter(output_path, max_steps=max_steps) as writer:
+        for df in iter_cohort(cohort_path, chunk_size):
+            ids = df[id_col].tolist() if id_col else list(range(n, n + len(df)))
+            n += len(df)
+
+            # 빈 칸 / NaN / inf가 있는 환자는 plan 없이 건너뛰고 id를 남긴다
+            states = feature_matrix(df)
+            valid = np.isfinite(states).all(axis=1)
+            if not valid.all():
+                bad_ids = [pid for pid, ok in zip(ids, valid) if not ok]
+                skipped += len(bad_ids)
+                skipped_ids += bad_ids[:MAX_SKIPPED_IDS - len(skipped_ids)]
+                print(f"Skipping {len(bad_ids)} patients with missing / non-finite features: {bad_ids[:20]}")
+                states = states[valid]
+                ids = [pid for pid, ok in zip(ids, valid) if ok]
+            if len(states):
+                plans = plan_states(states, env, actor, max_steps=max_steps)
+                for record in plan_records(ids, plans):
+                    writer.write(record)
+                planned += len(states)
+            print(f"{n} patients read, {planned} planned ({planned / (time.perf_counter() - t0):.0f}/s)")
+
+    elapsed = time.perf_counter() - t0
+    return {
+        "patients": planned,
+        "skipped": skipped,
+        "skipped_ids": skipped_ids,
+        "seconds": elapsed,
+        "patients_per_s": planned / elapsed if elapsed else 0.0,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Batch 8-week RL plans for a patient cohort")
+    parser.add_argument("cohort", help="CSV or Parquet file with the 34 model feature columns")
+    parser.add_argument("output", help="output .jsonl or .csv")
+    parser.add_argument("--chunk-size", type=int, default=4096)
+    parser.add_argument("--max-steps", type=int, default=8)
+    parser.add_argument("--id-col", default=None, help="patient id column (default: row number)")
+    parser.add_argument("--seed", type=int, default=None)
+    args = parser.parse_args()
+
+    stats = run_batch(args.cohort, args.output, args.chunk_size, args.max_steps, args.id_col, args.seed)
+    print(f"Done: {stats['patients']} patients in {stats['seconds']:.1f}s -> {args.output}")
+    if stats["skipped"]:
+        more = " ..." if stats["skipped"] > 50 else ""
+        print(f"{stats['skipped']} patients skipped (missing / non-finite features): {stats['skipped_ids'][:50]}{more}")
+
+
+if __name__ == "__main__":
+    main()
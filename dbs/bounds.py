@@ -0,0 +1,87 @@
+"""
+Action bounds (col_minmax) used by the env step and HybridActor delta clamp.
+
+학습 pickle(input.pkl / output.pkl)에서 한 번만 계산해서 model/bounds.json으로 내보내고,
+inference에서는 pandas 없이 이 파일만 읽는다.
+
+    python -m dbs.bounds          # model/bounds.json 다시 생성
+"""
+import json
+import os
+from typing import Dict, Tuple
+
+import numpy as np
+
+from dbs.features import FEATURE_NAMES, NUM_FEATURES
+from dbs.paths import DEFAULT_BOUNDS, ROOT_DIR
+
+BOUNDS_VERSION = 1
+
+
+def clip_bounds(col_minmax: Dict[int, Tuple[float, float]], num_features: int = NUM_FEATURES) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    col_minmax -> (lo, hi) [num_features] 배열
+    step / compute_delta에서 쓰는 clip 범위 (min//3, max//3)
+    """
+    lo = np.array([col_minmax[i][0] // 3 for i in range(num_features)], dtype=np.float64)
+    hi = np.array([col_minmax[i][1] // 3 for i in range(num_features)], dtype=np.float64)
+    return lo, hi
+
+
+def compute_col_minmax(
+    input_path: str = os.path.join(ROOT_DIR, "input.pkl"),
+    output_path: str = os.path.join(ROOT_DIR, "output.pkl"),
+) -> Dict[int, Tuple[float, float]]:
+    """학습 pickle에서 col_minmax 계산 (export / 학습 전용, pandas 필요)"""
+    import pandas as pd
+
+    X = pd.read_pickle(input_path)
+    y = pd.read_pickle(output_path)
+    newdf = pd.concat([X, y], axis=1)
+    return {
+        idx: (newdf.iloc[:, idx].min(), newdf.iloc[:, idx].max())
+        for idx in range(newdf.shape[1])
+    }
+
+
+def export_bounds(path: str = DEFAULT_BOUNDS, col_minmax: Dict[int, Tuple[float, float]] = None) -> str:
+    if col_minmax is None:
+        col_minmax = compute_col_minmax()
+    lo, hi = clip_bounds(col_minmax)
+    artifact = {
+        "version": BOUNDS_VERSION,
+        "features": FEATURE_NAMES,
+        "min": [float(col_minmax[i][0]) for i in range(NUM_FEATURES)],
+        "max": [float(col_minmax[i][1]) for i in range(NUM_FEATURES)],
+        "clip_lo": lo.tolist(),
+        "clip_hi": hi.tolist(),
+    }
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(artifact, f, indent=2)
+    return path
+
+
+def _read_artifact(path: str) -> Dict:
+    with open(path, "r", encoding="utf-8") as f:
+        artifact = json.load(f)
+    if artifact.get("version") != BOUNDS_VERSION:
+        raise ValueError(f"Unsupported bounds version {artifact.get('version')} in {path}")
+    if artifact.get("features") != FEATURE_NAMES:
+        raise ValueError(f"Feature order in {path} does not match FEATURE_NAMES")
+    return artifact
+
+
+def load_col_minmax(path: str = DEFAULT_BOUNDS) -> Dict[int, Tuple[float, float]]:
+    """model/bounds.json -> {idx: (min, max)} (34개 feature)"""
+    artifact = _read_artifact(path)
+    return {i: (artifact["min"][i], artifact["max"][i]) for i in range(NUM_FEATURES)}
+
+
+def load_clip_bounds(path: str = DEFAULT_BOUNDS) -> Tuple[np.ndarray, np.ndarray]:
+    """model/bounds.json -> 미리 계산된 (min//3, max//3) 배열"""
+    artifact = _read_artifact(path)
+    return np.array(artifact["clip_lo"], dtype=np.float64), np.array(artifact["clip_hi"], dtype=np.float64)
+
+
+if __name__ == "__main__":
+    print(f"Wrote {export_bounds()}")
@@ -0,0 +1,144 @@
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+import torch
+
+from dbs.bounds import clip_bounds, load_col_minmax
+from dbs.features import NUM_FEATURES, state_from_dict
+from dbs.scorer import ScoringService, get_scorer, scoring
+
+
+class PatientEnv:
+    def __init__(self, score_model=scoring, max_steps=5, col_minmax: Optional[Dict[int, Tuple[float, float]]] = None):
+        """
+        patient_data: dict {patient_id: {"features": np.array, "label": int}}
+        score_model: scoring DNN 모델 (reward용)
+        col_minmax: {idx: (min, max)} (None이면 model/bounds.json)
+        """
+        self.state = np.zeros(NUM_FEATURES, dtype=np.float32)
+        self.score_model = score_model
+        self.max_steps = max_steps
+        self.num_features = NUM_FEATURES
+        self.col_minmax = col_minmax if col_minmax is not None else load_col_minmax()
+        self.last_score = None      # self.state의 score (다음 step의 old_reward로 재사용)
+        self.forward_passes = 0     # episode당 score_model forward 횟수
+
+    def _score(self, state):
+        self.forward_passes += 1
+        state_tensor = torch.tensor(state, dtype=torch.float32).unsqueeze(0)
+        with torch.no_grad():
+            return self.score_model(state_tensor)
+
+    def _start_episode(self):
+        self.steps = 0
+        self.done = False
+        self.forward_passes = 0
+        self.last_score = self._score(self.state)
+
+    def reset(self, patient_id):  #pid를 받고 해당 환자의 변수정보를 state에 저장
+        self.patient = self.patient_data[patient_id]
+        self.state = self.patient['features'].copy()
+        self._start_episode()
+        return self.state.copy()
+
+    def reset_from_dict(self, input_dict):
+        # 환경용 feature 순서에 맞게 numpy state 저장
+        self.state = state_from_dict(input_dict)
+        self._start_episode()
+        return self.state.copy()
+
+    def step(self, action_idx, delta, alpha=5):
+        """
+        action: [action_idx; 선택할 변수 인덱스 , delta; idx 변수에 대해서 변화시킬 값의 정도] 
+        delta: float, 선택 변수에 더할 값
+        """
+
+        # 변수별 min-max 범위 적용
+        var_min, var_max = self.col_minmax[action_idx.item()]
+
+        # reward 계산: 이전 시기의 state score는 직전 step(또는 reset)에서 계산한 값 재사용
+        old_reward = self.last_score
+
+        self.state[action_idx.item()]= np.clip(self.state[action_idx.item()]+ delta.item(), var_min//3, var_max//3)  # action으로 state update
+
+        new_reward = self._score(self.state)  #new state -> reward계산
+        self.last_score = new_reward
+
+        self.steps += 1
+        self.done = self.steps >= self.max_steps
+        return self.state.copy(), alpha*(old_reward-new_reward), self.done   #업데이트된 state 반환, dbs score의 감소량에 비례하는 보상 -> dbs score감소를 촉진, episode 끝났는지 반환
+
+    def state_dim(self):
+        return self.num_features
+
+    def action_dim(self):
+        return self.num_features  # 34개 변수 중 1개 선택
+
+
+class VectorPatientEnv:
+    def __init__(self, col_minmax: Dict[int, Tuple[float, float]], scorer: Optional[ScoringService] = None, max_steps=5):
+        """
+        N명의 환자를 한 번에 step하는 PatientEnv
+        col_minmax: {idx: (min, max)} -> clip 범위 (min//3, max//3)
+        scorer: ScoringService (None이면 프로세스 전역 scorer)
+        """
+        self.scorer = scorer or get_scorer()
+        self.max_steps = max_steps
+        self.num_features = NUM_FEATURES
+        self.lo, self.hi = clip_bounds(col_minmax, self.num_features)
+        self.state = np.zeros((0, self.num_features), dtype=np.float32)
+        self.last_score = np.zeros(0, dtype=np.float32)   # self.state의 score [N] (다음 step의 old_reward로 재사용)
+        self.steps = 0
+        self.done = np.zeros(0, dtype=bool)
+
+    @property
+    def num_envs(self) -> int:
+        return self.state.shape[0]
+
+    def reset(self, states: Any) -> np.ndarray:
+        """states: [N,34] (np.ndarray / DataFrame / tensor)"""
+        if isinstance(states, torch.Tensor):
+            states = states.detach().cpu().numpy()
+        self.state = np.array(states, dtype=np.float32).reshape(-1, self.num_features)
+        self.last_score = self._score(self.state)
+        self.steps = 0
+        self.done = np.zeros(self.num_envs, dtype=bool)
+        return self.state.copy()
+
+    def _score(self, states: np.ndarray) -> np.ndarray:
+        if len(states) == 0:
+            return np.zeros(0, dtype=np.float32)
+        return self.scorer.score(states)
+
+    def reset_from_dicts(self, input_dicts: List[Dict[str, Any]]) -> np.ndarray:
+        return self.reset(np.stack([state_from_dict(d) for d in input_dicts]))
+
+    def step(self, action_idx: Any, delta: Any, alpha=5):
+        """
+        action_idx: [N] 변수 인덱스, delta: [N] 더할 값
+        return: next_state [N,34], reward [N], done [N]
+        """
+        if isinstance(action_idx, torch.Tensor):
+            action_idx = action_idx.detach().cpu().numpy()
+        if isinstance(delta, torch.Tensor):
+            delta = delta.detach().cpu().numpy()
+        idx = np.asarray(action_idx, dtype=np.int64).reshape(-1)
+        delta = np.asarray(delta, dtype=np.float32).reshape(-1)
+        rows = np.arange(self.num_envs)
+
+        self.state[rows, idx] = np.clip(self.state[rows, idx] + delta, self.lo[idx], self.hi[idx])
+
+        # old state score는 직전 step(또는 reset)에서 계산한 값 재사용 -> step당 N행 forward 한 번
+        old_reward = self.last_score
+        new_reward = self._score(self.state)
+        self.last_score = new_reward
+
+        self.steps += 1
+        self.done = np.full(self.num_envs, self.steps >= self.max_steps)
+        return self.state.copy(), alpha * (old_reward - new_reward), self.done.copy()
+
+    def state_dim(self):
+        return self.num_features
+
+    def action_dim(self):
+        return self.num_features
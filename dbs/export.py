@@ -0,0 +1,238 @@
+"""
+TotalModel / HybridActor -> TorchScript / ONNX artifacts for CPU inference (dbs.runtime).
+
+- Dropout은 export 전에 빼고 (eval에서는 identity), TotalModel의 열 선택 / hidden_layers 루프는 trace 시 graph로 펴진다
+- artifact는 dbs.models class 코드 없이 torch.jit.load / onnxruntime만으로 로드된다
+- HybridActor의 Categorical sample은 graph 밖에서 만든 Gumbel noise 입력으로 바꾼다:
+  argmax(logits + gumbel)은 Categorical(logits).sample()과 같은 분포
+
+    python -m dbs.export                          # model/total_model.ts, model/actor.ts, (+ .onnx)
+    python -m dbs.export --format torchscript --check-only
+"""
+import argparse
+import importlib.util
+import time
+from typing import Callable, Dict, List, Optional, Tuple
+
+import torch
+import torch.nn as nn
+
+from dbs.features import NUM_FEATURES
+from dbs.models import HybridActor, TotalModel
+from dbs.paths import (
+    DEFAULT_ACTOR_ONNX,
+    DEFAULT_ACTOR_TS,
+    DEFAULT_SCORER_ONNX,
+    DEFAULT_SCORER_TS,
+)
+from dbs.scorer import probs_to_score
+
+ONNX_OPSET = 17
+
+# TotalModel.forward의 열 선택 (module1 / module2 입력)
+MODULE1_COLS = [0, 1, 2, 4, 28, 31]
+MODULE2_COLS = [c for c in range(NUM_FEATURES) if c not in MODULE1_COLS]
+
+
+def strip_dropout(seq: nn.Sequential) -> nn.Sequential:
+    return nn.Sequential(*[m for m in seq if not isinstance(m, nn.Dropout)])
+
+
+class ExportTotalModel(nn.Module):
+    """TotalModel과 같은 weight / 같은 logits, Dropout 없음"""
+
+    def __init__(self, model: TotalModel):
+        super().__init__()
+        self.register_buffer("cols1", torch.tensor(MODULE1_COLS), persistent=False)
+        self.register_buffer("cols2", torch.tensor(MODULE2_COLS), persistent=False)
+        self.module1 = nn.Sequential(strip_dropout(model.module1.input_layer), model.module1.output_layer)
+        self.module2 = nn.Sequential(strip_dropout(model.module2.input_layer), model.module2.output_layer)
+        self.hidden_layers = nn.ModuleList([strip_dropout(layer) for layer in model.hidden_layers])
+        self.output_layers = strip_dropout(model.output_layers)
+
+    def forward(self, x: torch.Tensor) -> torch.Tensor:
+        out1 = self.module1(x.index_select(1, self.cols1))
+        out2 = self.module2(x.index_select(1, self.cols2))
+        k = torch.cat([out1, out2], dim=1)
+        residual = k
+        for layer in self.hidden_layers:
+            k = layer(k) + residual
+        return self.output_layers(k)
+
+
+class ExportActor(nn.Module):
+    """(states [B,34], gumbel [B,34]) -> (action_index [B] int64, delta [B])"""
+
+    def __init__(self, actor: HybridActor):
+        super().__init__()
+        self.shared = actor.shared
+        self.discrete_head = actor.discrete_head
+        self.delta_net = actor.delta_net
+        self.discrete_dim = actor.discrete_dim
+        self.register_buffer("action_mask", actor.action_mask.clone())
+        self.register_buffer("delta_lo", actor.delta_lo.clone())
+        self.register_buffer("delta_hi", actor.delta_hi.clone())
+
+    def forward(self, states: torch.Tensor, gumbel: torch.Tensor) -> Tuple[torch.Tensor, torch.Tensor]:
+        logits = self.discrete_head(self.shared(states)) + self.action_mask
+        action_index = torch.argmax(logits + gumbel, dim=1)
+        onehot = torch.nn.functional.one_hot(action_index, num_classes=self.discrete_dim).to(states.dtype)
+        delta = self.delta_net(torch.cat([states, onehot], dim=1)).squeeze(1)
+        # torch.clamp(min=tensor, max=tensor)와 같은 결과, ONNX Clip은 scalar 범위만 받아서 max / min으로
+        delta = torch.min(torch.max(delta, self.delta_lo[action_index]), self.delta_hi[action_index])
+        return action_index, delta
+
+
+def sample_gumbel(shape, generator: Optional[torch.Generator] = None) -> torch.Tensor:
+    u = torch.rand(shape, generator=generator).clamp_(1e-10, 1.0 - 1e-7)
+    return -torch.log(-torch.log(u))
+
+
+def sample_states(n: int, col_minmax: Dict[int, Tuple[float, float]], seed: int = 0) -> torch.Tensor:
+    """bounds.json의 변수별 [min, max] 안에서 균등 sample -> [n,34] (parity check 입력)"""
+    g = torch.Generator().manual_seed(seed)
+    lo = torch.tensor([col_minmax[i][0] for i in range(NUM_FEATURES)], dtype=torch.float32)
+    hi = torch.tensor([col_minmax[i][1] for i in range(NUM_FEATURES)], dtype=torch.float32)
+    return lo + (hi - lo) * torch.rand((n, NUM_FEATURES), generator=g)
+
+
+def load_eager() -> Tuple[TotalModel, HybridActor, Dict[int, Tuple[float, float]]]:
+    from dbs.planner import get_col_minmax, load_actor
+    from dbs.scorer import ScoringService
+
+    scorer = ScoringService(device=torch.device("cpu"))
+    return scorer.model, load_actor(), get_col_minmax()
+
+
+# ----------------- export -----------------
+def _example_inputs(batch: int = 4) -> Tuple[torch.Tensor, torch.Tensor]:
+    return torch.zeros(batch, NUM_FEATURES), torch.zeros(batch, NUM_FEATURES)
+
+
+def export_torchscript(model: TotalModel, actor: HybridActor,
+                       scorer_path: str = DEFAULT_SCORER_TS, actor_path: str = DEFAULT_ACTOR_TS) -> List[str]:
+    states, gumbel = _example_inputs()
+    with torch.no_grad():
+        scorer_ts = torch.jit.freeze(torch.jit.trace(ExportTotalModel(model).eval(), (states,)))
+        actor_ts = torch.jit.freeze(torch.jit.trace(ExportActor(actor).eval(), (states, gumbel)))
+    scorer_ts.save(scorer_path)
+    actor_ts.save(actor_path)
+    return [scorer_path, actor_path]
+
+
+def export_onnx(model: TotalModel, actor: HybridActor,
+                scorer_path: str = DEFAULT_SCORER_ONNX, actor_path: str = DEFAULT_ACTOR_ONNX) -> List[str]:
+    if importlib.util.find_spec("onnx") is None:   # torch.onnx.export가 필요로 함
+        raise RuntimeError("ONNX export requires onnx (pip install onnx onnxruntime).")
+
+    states, gumbel = _example_inputs()
+    batch_axis = {0: "batch"}
+    with torch.no_grad():
+        torch.onnx.export(
+            ExportTotalModel(model).eval(), (states,), scorer_path,
+            input_names=["states"], output_names=["logits"],
+            dynamic_axes={"states": batch_axis, "logits": batch_axis},
+            opset_version=ONNX_OPSET, dynamo=False,
+        )
+        torch.onnx.export(
+            ExportActor(actor).eval(), (states, gumbel), actor_path,
+            input_names=["states", "gumbel"], output_names=["action_index", "delta"],
+            dynamic_axes={"states": batch_axis, "gumbel": batch_axis, "action_index": batch_axis, "delta": batch_axis},
+            opset_version=ONNX_OPSET, dynamo=False,
+        )
+    return [scorer_path, actor_path]
+
+
+# ----------------- parity check -----------------
+def eager_act(actor: HybridActor, states: torch.Tensor, gumbel: torch.Tensor) -> Tuple[torch.Tensor, torch.Tensor]:
+    """HybridActor.act과 같은 계산, sample만 주어진 gumbel noise로 (export artifact 비교 기준)"""
+    logits = actor.discrete_head(actor.shared(states)) + actor.action_mask
+    action_index = torch.argmax(logits + gumbel, dim=1)
+    return action_index, actor.compute_delta(states, action_index).squeeze(1)
+
+
+def check_parity(fmt: str, n: int = 4096, atol: float = 1e-4, seed: int = 0) -> Dict[str, float]:
+    """
+    eager TotalModel / HybridActor vs export artifact (dbs.runtime으로 로드), 같은 입력 / 같은 noise.
+    맞지 않으면 AssertionError.
+    """
+    from dbs.runtime import load_runtime_actor, load_runtime_model
+
+    model, actor, col_minmax = load_eager()
+    states = sample_states(n, col_minmax, seed)
+    gumbel = sample_gumbel(states.shape, torch.Generator().manual_seed(seed + 1))
+
+    runtime_model = load_runtime_model(fmt)
+    runtime_actor = load_runtime_actor(fmt)
+    with torch.no_grad():
+        logits = model(states)
+        logits_rt = runtime_model(states)
+        scores = probs_to_score(torch.softmax(logits, dim=1))
+        scores_rt = probs_to_score(torch.softmax(logits_rt, dim=1))
+
+        action, delta = eager_act(actor, states, gumbel)
+        action_rt, delta_rt = runtime_actor.forward_noise(states, gumbel)
+
+    result = {
+        "rows": n,
+        "logits_max_abs_diff": float((logits - logits_rt).abs().max()),
+        "score_max_abs_diff": float((scores - scores_rt).abs().max()),
+        "action_mismatch": int((action != action_rt).sum()),
+        "delta_max_abs_diff": float((delta - delta_rt).abs().max()),
+    }
+    assert result["logits_max_abs_diff"] <= atol, result
+    assert result["action_mismatch"] == 0, result
+    assert result["delta_max_abs_diff"] <= atol, result
+    return result
+
+
+def _latency_ms(fn: Callable, x: torch.Tensor, repeat: int = 200) -> float:
+    with torch.no_grad():
+        for _ in range(10):
+            fn(x)
+        t0 = time.perf_counter()
+        for _ in range(repeat):
+            fn(x)
+    return (time.perf_counter() - t0) / repeat * 1000
+
+
+def compare_latency(fmt: str, batches=(1, 256)) -> None:
+    from dbs.runtime import load_runtime_actor, load_runtime_model
+
+    model, actor, col_minmax = load_eager()
+    runtime_model = load_runtime_model(fmt)
+    runtime_actor = load_runtime_actor(fmt)
+    for b in batches:
+        x = sample_states(b, col_minmax)
+        print(
+            f"  batch {b:4d}  scorer eager {_latency_ms(model, x):.3f}ms / {fmt} {_latency_ms(runtime_model, x):.3f}ms"
+            f"   actor eager {_latency_ms(actor.act, x):.3f}ms / {fmt} {_latency_ms(runtime_actor.act, x):.3f}ms"
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Export TotalModel / HybridActor to TorchScript / ONNX and check parity")
+    parser.add_argument("--format", nargs="+", choices=["torchscript", "onnx"], default=["torchscript", "onnx"])
+    parser.add_argument("--check-only", action="store_true", help="skip export, only check existing artifacts")
+    parser.add_argument("--rows", type=int, default=4096, help="rows for the parity check")
+    parser.add_argument("--atol", type=float, default=1e-4)
+    args = parser.parse_args()
+
+    if not args.check_only:
+        model, actor, _ = load_eager()
+        for fmt in args.format:
+            export = export_torchscript if fmt == "torchscript" else export_onnx
+            print(f"{fmt}: wrote {', '.join(export(model, actor))}")
+
+    for fmt in args.format:
+        result = check_parity(fmt, n=args.rows, atol=args.atol)
+        print(
+            f"{fmt} parity OK on {result['rows']} rows: logits max |diff| {result['logits_max_abs_diff']:.2e}, "
+            f"score {result['score_max_abs_diff']:.2e}, delta {result['delta_max_abs_diff']:.2e}, "
+            f"{result['action_mismatch']} action mismatches"
+        )
+        compare_latency(fmt)
+
+
+if __name__ == "__main__":
+    main()
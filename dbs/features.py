@@ -0,0 +1,22 @@
+from typing import Any, Dict, List
+
+import numpy as np
+
+# 모델 입력 순서 (input.pkl 컬럼 순서와 동일)
+FEATURE_NAMES: List[str] = [
+    'gender','age','race','educ','marry','house','pov','wt','ht',
+    'bmi','wst','hip','dia','pulse','sys','alt','albumin','ast',
+    'crea','chol','tyg','ggt','wbc','hb','hct','ldl','hdl',
+    'acratio','glu','insulin','crp','hb1ac','mvpa','ac_week'
+]
+NUM_FEATURES = len(FEATURE_NAMES)
+
+
+def state_from_dict(input_dict: Dict[str, Any]) -> np.ndarray:
+    """dict -> [34] float32 state, FEATURE_NAMES 순서"""
+    state_list = []
+    for key in FEATURE_NAMES:
+        if key not in input_dict:
+            raise KeyError(f"{key} is missing in input_dict")
+        state_list.append(float(input_dict[key]))
+    return np.array(state_list, dtype=np.float32)
@@ -0,0 +1,136 @@
+"""
+Dynamic micro-batching in front of ScoringService.
+
+환자 한 명 scoring([1,34])은 matmul보다 Python / torch 호출 overhead가 훨씬 크다.
+동시에 들어온 score 요청들을 queue에 모았다가 max_batch 행이 차거나 첫 요청이 max_wait 만큼 기다리면
+[B,34] forward 한 번으로 계산하고, 결과를 요청별로 잘라서 돌려준다.
+
+    batcher = get_score_batcher()
+    batcher.score(state)                                  # blocking, thread-safe
+    await asyncio.wrap_future(batcher.submit(states))     # async (service.py)
+"""
+import os
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+import torch
+
+from dbs.features import NUM_FEATURES
+from dbs.scorer import ScoringService, get_scorer
+
+SCORE_MAX_BATCH = int(os.getenv("SCORE_MAX_BATCH", "64"))            # rows per forward
+# 첫 요청이 batch를 기다리는 최대 시간. 0이면 앞 forward가 도는 동안 쌓인 요청만 모은다
+# (CPU에서는 0이 p50 / p99 / throughput 모두 제일 좋았음, benchmarks/bench_scoring.py)
+SCORE_MAX_WAIT_MS = float(os.getenv("SCORE_MAX_WAIT_MS", "0"))
+
+_Item = Tuple[np.ndarray, Future, float]   # rows, future, submit time
+
+
+class MicroBatcher:
+    def __init__(
+        self,
+        scorer: Optional[ScoringService] = None,
+        max_batch: int = SCORE_MAX_BATCH,
+        max_wait_ms: float = SCORE_MAX_WAIT_MS,
+    ):
+        self.scorer = scorer or get_scorer()
+        self.max_batch = max_batch
+        self.max_wait = max_wait_ms / 1000
+
+        self._queue: "queue.Queue[_Item]" = queue.Queue()
+        self._pending: Optional[_Item] = None   # 이번 batch에 안 들어간 요청 (다음 batch 첫 요청)
+
+        self._lock = threading.Lock()
+        self.requests = 0
+        self.batches = 0
+        self.rows = 0
+
+        self._thread = threading.Thread(target=self._loop, name="score-microbatch", daemon=True)
+        self._thread.start()
+
+    # ----------------- public API -----------------
+    def submit(self, batch: Any) -> Future:
+        """batch: [34] 또는 [B,34] -> Future([B] float ndarray)"""
+        if isinstance(batch, torch.Tensor):
+            batch = batch.detach().cpu().numpy()
+        x = np.asarray(batch, dtype=np.float32).reshape(-1, NUM_FEATURES)
+        future: Future = Future()
+        self._queue.put((x, future, time.perf_counter()))
+        return future
+
+    def score(self, batch: Any) -> np.ndarray:
+        return self.submit(batch).result()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "max_batch": self.max_batch,
+                "max_wait_ms": self.max_wait * 1000,
+                "requests": self.requests,
+                "batches": self.batches,
+                "rows": self.rows,
+                "mean_batch_rows": self.rows / self.batches if self.batches else 0.0,
+            }
+
+    # ----------------- worker -----------------
+    def _collect(self) -> List[_Item]:
+        first = self._pending or self._queue.get()
+        self._pending = None
+        items = [first]
+        rows = len(first[0])
+        # 첫 요청이 들어온 시각 기준 (앞 batch forward 동안 이미 기다린 시간 포함)
+        deadline = first[2] + self.max_wait
+        while rows < self.max_batch:
+            timeout = deadline - time.perf_counter()
+            try:
+                item = self._queue.get(timeout=timeout) if timeout > 0 else self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if rows + len(item[0]) > self.max_batch:
+                # 요청 하나는 쪼개지 않는다 -> 다음 batch로
+                self._pending = item
+                break
+            items.append(item)
+            rows += len(item[0])
+        return items
+
+    def _loop(self):
+        while True:
+            # cancel된 요청 (async caller가 끊김)은 빼고, 나머지는 더 이상 cancel 불가
+            items = [item for item in self._collect() if item[1].set_running_or_notify_cancel()]
+            if not items:
+                continue
+            try:
+                scores = self.scorer.score(np.concatenate([x for x, *_ in items]))
+            except Exception as e:
+                for _, future, _ in items:
+                    future.set_exception(e)
+                continue
+
+            start = 0
+            for x, future, _ in items:
+                future.set_result(scores[start:start + len(x)])
+                start += len(x)
+
+            with self._lock:
+                self.requests += len(items)
+                self.batches += 1
+                self.rows += start
+
+
+_batcher: Optional[MicroBatcher] = None
+_batcher_lock = threading.Lock()
+
+
+def get_score_batcher() -> MicroBatcher:
+    """프로세스 전역 MicroBatcher (전역 scorer, SCORE_MAX_BATCH / SCORE_MAX_WAIT_MS)"""
+    global _batcher
+    if _batcher is None:
+        with _batcher_lock:
+            if _batcher is None:
+                _batcher = MicroBatcher()
+    return _batcher
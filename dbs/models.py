@@ -0,0 +1,242 @@
+from typing import Dict, Optional, Tuple
+
+import torch
+import torch.nn as nn
+import torch.nn.functional as F
+from torch.distributions import Categorical
+
+from dbs.bounds import clip_bounds
+
+# 앞 9개 변수(gender~ht)는 바꿀 수 없는 변수 -> action으로 선택하지 않음
+NUM_MASKED_ACTIONS = 9
+
+
+class MainModule(nn.Module):
+    def __init__(self,input_dim=6,output_dim=3,do1=0.5,activ=0):
+        super().__init__()
+        self.activ=nn.GELU() if activ==1 else nn.ReLU()
+        self.input_layer=nn.Sequential(
+            nn.Linear(input_dim,6),
+            self.activ,
+            nn.Dropout(do1),
+            
+            nn.Linear(6,4),
+            self.activ,
+            nn.Dropout(do1),
+
+            nn.Linear(4,3),
+            self.activ,
+            nn.Dropout(do1),
+        )
+        
+        self.output_layer=nn.Linear(3,output_dim)
+    def forward(self,x):
+        x=self.input_layer(x)
+        output=self.output_layer(x)
+        return output
+
+class SubModule(nn.Module):
+    def __init__(self,input_dim=28,output_dim=7,do1=0.5,activ=0):
+        super().__init__()
+        self.activ=nn.GELU() if activ==1 else nn.ReLU()
+        self.input_layer=nn.Sequential(
+            nn.Linear(input_dim,28),
+            self.activ,
+            nn.Dropout(do1),
+            
+            nn.Linear(28,14),
+            self.activ,
+            nn.Dropout(do1),
+
+            nn.Linear(14,7),
+            self.activ,
+            nn.Dropout(do1),
+        )
+        
+        self.output_layer=nn.Linear(7,output_dim)
+    def forward(self,x):
+        x=self.input_layer(x)
+        output=self.output_layer(x)
+        return output
+
+class TotalModel(nn.Module):    #TotalModel의 128 dim에서 skip connection 적용
+    def __init__(self,do1,do2,activ):
+        super().__init__()
+
+        self.activ=nn.GELU() if activ==1 else nn.ReLU()
+
+        self.module1=SubModule(6,3,do1,activ)
+        self.module2=SubModule(28,7,do1,activ)
+
+        
+        self.hidden_layers=nn.ModuleList([
+            nn.Sequential(
+                nn.Linear(10,10),
+                self.activ,
+                nn.Dropout(do2),
+            )for _ in range(1)
+        ])
+        
+        self.output_layers=nn.Sequential(
+            nn.Linear(10,5),
+            self.activ,
+            nn.Dropout(do2),
+            
+            nn.Linear(5,5),
+            self.activ,
+            nn.Dropout(do2),            
+            
+            nn.Linear(5,3)         
+        )
+        
+    
+    def forward(self,x):
+        x1=x[:,[0,1,2,4,28,31]]
+        x2=x[:,[3,5,6,7,8,9,10,11,12,13,14,15,16,17,18,19,20,21,22,23,24,25,26,27,29,30,32,33]]
+
+        out1=self.module1(x1)        #특정 4개의 열 데이터는 module1에 통과 -> output1 나온다      -shape:[batch_size,16]
+        out2=self.module2(x2)        #나머지 13개의 열 데이터는 module2에 통과 -> output2 나온다   -shape:[batch_size,16]
+
+        out=torch.cat([out1,out2],dim=1)       #-shape:[batch_size,32]
+        k=out
+        residual=k          #초기 결과를 k로 잔차 저장
+        for layer in self.hidden_layers:
+            j=layer(k)
+            k=j+residual
+            
+        output=self.output_layers(k)
+        return output
+
+
+
+class HybridActor(nn.Module):
+    def __init__(self, state_dim=34, discrete_dim=34, col_minmax: Optional[Dict[int, Tuple[float, float]]] = None):
+        super().__init__()
+        self.state_dim = state_dim
+        self.discrete_dim = discrete_dim
+
+        # Shared encoder
+        self.shared = nn.Sequential(
+            nn.Linear(state_dim, 128),
+            nn.ReLU(),
+            nn.Linear(128, 64),
+            nn.ReLU()
+        )
+
+        # Discrete head (variable index 선택)
+        self.discrete_head = nn.Linear(64, discrete_dim)
+        
+
+        # Delta head: state + one-hot(index) 입력
+        # input dim = state_dim + discrete_dim
+        self.delta_net = nn.Sequential(
+            nn.Linear(state_dim + discrete_dim, 128),
+            nn.ReLU(),
+            nn.Linear(128, 40),
+            nn.ReLU(),
+            nn.Linear(40, 8),
+            nn.ReLU(),
+            nn.Linear(8, 3),
+            nn.ReLU(),
+            nn.Linear(3, 1),
+        )
+
+        # 열(column) 단위 action mask, 변수별 delta clamp 범위 (state_dict에는 저장 안 함)
+        action_mask = torch.zeros(discrete_dim)
+        action_mask[:NUM_MASKED_ACTIONS] = -1e9
+        self.register_buffer("action_mask", action_mask, persistent=False)
+        self.register_buffer("delta_lo", torch.full((discrete_dim,), float("-inf")), persistent=False)
+        self.register_buffer("delta_hi", torch.full((discrete_dim,), float("inf")), persistent=False)
+        if col_minmax is not None:
+            self.set_bounds(col_minmax)
+
+    def set_bounds(self, col_minmax: Dict[int, Tuple[float, float]]):
+        """col_minmax -> delta clamp 범위 (min//3, max//3)"""
+        lo, hi = clip_bounds(col_minmax, self.discrete_dim)
+        self.delta_lo.copy_(torch.as_tensor(lo, dtype=torch.float32))
+        self.delta_hi.copy_(torch.as_tensor(hi, dtype=torch.float32))
+        return self
+
+    def forward(self, state):
+        h = self.shared(state)
+        logits = self.discrete_head(h)
+        logits = logits + self.action_mask   # [34] / [B,34] 모두 마지막 축(변수) 기준으로 mask
+        dist = Categorical(logits=logits) 
+        action_index = dist.sample()   #34개의 변수에 대한 logit값을 얻은 후에, 이 logit으로 dist 만들어서 index 정수값 샘플링한다. (후반에 별로 -> epsilon-greedy?)
+        return action_index
+
+    def compute_delta(self, state, action_index):
+        if state.dim() == 1:
+            state = state.unsqueeze(0)  # [1, state_dim]
+
+        # action_index도 1차원으로 맞춤
+        if action_index.dim() == 0:   # 스칼라
+            action_index = action_index.unsqueeze(0)  # [1]
+        # One-hot 인코딩
+        onehot = F.one_hot(action_index.long(), num_classes=self.discrete_dim).float()
+
+        # concat
+        x = torch.cat([state, onehot], dim=1)
+
+        # delta 예측
+        delta = self.delta_net(x)
+        idx = action_index.long().unsqueeze(1)
+        delta = torch.clamp(delta, min=self.delta_lo[idx], max=self.delta_hi[idx])
+        return delta
+
+    def act(self, states):
+        """
+        batch inference: states [B,34] -> (action_index [B], delta [B])
+        encoder 한 번 + delta_net 한 번, clamp 범위는 device 위에서 gather
+        """
+        if states.dim() == 1:
+            states = states.unsqueeze(0)
+
+        h = self.shared(states)
+        logits = self.discrete_head(h) + self.action_mask
+        action_index = Categorical(logits=logits).sample()   # [B]
+
+        onehot = F.one_hot(action_index, num_classes=self.discrete_dim).float()
+        delta = self.delta_net(torch.cat([states, onehot], dim=1)).squeeze(1)   # [B]
+        delta = torch.clamp(delta, min=self.delta_lo[action_index], max=self.delta_hi[action_index])
+        return action_index, delta
+
+
+class HybridCritic(nn.Module):
+    def __init__(self, state_dim=34, discrete_dim=34):
+        super().__init__()
+        self.discrete_dim=discrete_dim
+        
+        # Input dim = state + onehot(index) + delta
+        input_dim = state_dim + discrete_dim + 1
+        
+        self.q_net = nn.Sequential(
+            nn.Linear(input_dim, 128),
+            nn.ReLU(),
+            nn.Linear(128, 40),
+            nn.ReLU(),
+            nn.Linear(40, 8),
+            nn.ReLU(),
+            nn.Linear(8, 3),
+            nn.ReLU(),
+            nn.Linear(3, 1),
+        )
+
+    def forward(self, state, action_index, delta):
+        # action_index : [B] long
+        # delta : [B, 1] continuous
+
+        onehot = F.one_hot(action_index, num_classes=self.discrete_dim).float()
+        if state.ndim == 1:
+            state = state.unsqueeze(0)  # [1, state_dim]
+        if onehot.ndim == 1:
+            onehot = onehot.unsqueeze(0)  # [1, discrete_dim]
+
+        # delta
+        if delta.ndim == 0:
+            delta = delta.unsqueeze(0).unsqueeze(1)  # [1,1]
+        elif delta.ndim == 1:
+            delta = delta.unsqueeze(1)  # [batch, 1]
+        x = torch.cat([state, onehot, delta], dim=1)
+        q = self.q_net(x)
+        return q
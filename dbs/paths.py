@@ -0,0 +1,14 @@
+import os
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+MODEL_DIR = os.path.join(ROOT_DIR, "model")
+
+DEFAULT_WEIGHTS = os.path.join(MODEL_DIR, "best_model.pt")
+DEFAULT_ACTOR = os.path.join(MODEL_DIR, "actor.pt")
+DEFAULT_BOUNDS = os.path.join(MODEL_DIR, "bounds.json")
+
+# dbs.export 결과 (python -m dbs.export), MODEL_BACKEND=torchscript / onnx 일 때 dbs.runtime이 로드
+DEFAULT_SCORER_TS = os.path.join(MODEL_DIR, "total_model.ts")
+DEFAULT_ACTOR_TS = os.path.join(MODEL_DIR, "actor.ts")
+DEFAULT_SCORER_ONNX = os.path.join(MODEL_DIR, "total_model.onnx")
+DEFAULT_ACTOR_ONNX = os.path.join(MODEL_DIR, "actor.onnx")
@@ -0,0 +1,94 @@
+"""
+RL 8-week plan for a single patient (HybridActor rollout on PatientEnv).
+
+actor / bounds / scorer는 처음 호출할 때 한 번만 로드한다.
+"""
+import threading
+from typing import Any, Dict, Optional, Tuple, Union
+
+import torch
+
+from dbs.bounds import load_col_minmax
+from dbs.env import PatientEnv
+from dbs.features import FEATURE_NAMES
+from dbs.models import HybridActor
+from dbs.paths import DEFAULT_ACTOR
+from dbs.runtime import MODEL_BACKEND, RuntimeActor, load_runtime_actor
+from dbs.scorer import scoring
+
+_actor: Optional[Union[HybridActor, RuntimeActor]] = None
+_actor_lock = threading.Lock()
+_col_minmax: Optional[Dict[int, Tuple[float, float]]] = None
+
+
+def get_col_minmax() -> Dict[int, Tuple[float, float]]:
+    """model/bounds.json (프로세스당 한 번)"""
+    global _col_minmax
+    if _col_minmax is None:
+        _col_minmax = load_col_minmax()
+    return _col_minmax
+
+
+def load_actor(path: str = DEFAULT_ACTOR, bounds_path: Optional[str] = None) -> HybridActor:
+    col_minmax = load_col_minmax(bounds_path) if bounds_path else get_col_minmax()
+    actor = HybridActor(col_minmax=col_minmax)
+    actor.load_state_dict(torch.load(path, map_location="cpu"))
+    actor.eval()
+    return actor
+
+
+def get_actor() -> Union[HybridActor, RuntimeActor]:
+    """
+    프로세스 전역 actor: HybridActor (model/actor.pt + model/bounds.json),
+    MODEL_BACKEND=torchscript / onnx 이면 export artifact (bounds는 export 때 들어감). 둘 다 .act(states)
+    """
+    global _actor
+    if _actor is None:
+        with _actor_lock:
+            if _actor is None:
+                _actor = load_actor() if MODEL_BACKEND == "eager" else load_runtime_actor(MODEL_BACKEND)
+    return _actor
+
+
+def test_patient(env, actor, patient_dict, max_steps=8, alpha=100):
+    # state 만들기 (env도 같은 환자로 reset -> reset 시 계산한 score 재사용)
+    state = env.reset_from_dict(patient_dict)
+
+    # 결과 dict 초기화
+    output_dict = dict(patient_dict)
+
+    old_score = env.last_score
+
+
+    done = False
+    for step in range(1, max_steps + 1):
+
+        state_tensor = torch.tensor(state, dtype=torch.float32)
+
+        # --- action 선택 (index + delta 한 번에) ---
+        with torch.no_grad():
+            action_idx, delta = actor.act(state_tensor)
+        delta_float=delta.item()
+
+        # === ENV STEP ===
+        next_state, reward, done = env.step(action_idx, delta, alpha=alpha)
+
+        # step 기록
+        feature_name = FEATURE_NAMES[int(action_idx.item())]
+        output_dict[f"{step}week"] = (feature_name, delta_float)
+
+        state = next_state
+        new_score = env.last_score
+
+
+
+    output_dict["old_score"] = old_score
+    output_dict["new_score"] = new_score
+
+    return output_dict
+
+
+def plan_patient(patient_dict: Dict[str, Any], max_steps=8) -> Dict[str, Any]:
+    """환자 dict -> test_patient 결과 (1week..8week, old_score, new_score)"""
+    env = PatientEnv(scoring, max_steps=max_steps, col_minmax=get_col_minmax())
+    return test_patient(env, get_actor(), patient_dict, max_steps=max_steps)
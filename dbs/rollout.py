@@ -0,0 +1,203 @@
+"""
+Parallel rollout workers for train_ppo.
+
+patient_data를 shard로 나눠서 CPU process pool에서 episode를 돌리고,
+learner(main process)는 끝난 shard의 trajectory부터 batch 단위로 학습한다.
+각 worker는 actor / scorer를 자기 프로세스에 한 벌씩 들고 있다.
+
+    python -m dbs.rollout --epochs 5 --workers 8 --out model/actor.pt
+"""
+import argparse
+import multiprocessing as mp
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+import numpy as np
+import torch
+import torch.optim as optim
+
+from dbs.bounds import compute_col_minmax
+from dbs.env import VectorPatientEnv
+from dbs.models import HybridActor, HybridCritic
+from dbs.paths import DEFAULT_ACTOR, DEFAULT_WEIGHTS, ROOT_DIR
+from dbs.scorer import ScoringService
+
+# ----------------- WORKER SIDE -----------------
+_worker_actor: Optional[HybridActor] = None
+_worker_env: Optional[VectorPatientEnv] = None
+
+
+def _init_worker(col_minmax: Dict[int, Tuple[float, float]], weights_path: str, max_steps: int):
+    global _worker_actor, _worker_env
+    torch.set_num_threads(1)   # 코어당 worker 하나
+    scorer = ScoringService(weights_path, device=torch.device("cpu"))
+    _worker_actor = HybridActor(col_minmax=col_minmax).eval()
+    _worker_env = VectorPatientEnv(col_minmax, scorer=scorer, max_steps=max_steps)
+
+
+def _run_shard(actor_state: Dict[str, torch.Tensor], states: np.ndarray, alpha: float, seed: int) -> Dict[str, np.ndarray]:
+    """shard 하나의 episode를 끝까지 돌리고 transition을 [T*N, ...]로 펴서 반환"""
+    torch.manual_seed(seed)
+    _worker_actor.load_state_dict(actor_state)
+
+    state = _worker_env.reset(states)
+    traj = {"state": [], "action_idx": [], "delta": [], "reward": [], "next_state": [], "done": []}
+    done = np.zeros(len(state), dtype=bool)
+    with torch.no_grad():
+        while not done.all():
+            action_idx, delta = _worker_actor.act(torch.from_numpy(state))
+            next_state, reward, done = _worker_env.step(action_idx, delta, alpha=alpha)
+
+            traj["state"].append(state)
+            traj["action_idx"].append(action_idx.numpy())
+            traj["delta"].append(delta.numpy())
+            traj["reward"].append(reward.astype(np.float32))
+            traj["next_state"].append(next_state)
+            traj["done"].append(done.astype(np.float32))
+            state = next_state
+    return {k: np.concatenate(v, axis=0) for k, v in traj.items()}
+
+
+# ----------------- LEARNER SIDE -----------------
+def _features_array(patient_data: Any) -> np.ndarray:
+    """patient_data dict {pid: {"features": ...}} 또는 [N,34] 배열 -> float32 [N,34]"""
+    if isinstance(patient_data, dict):
+        return np.stack([np.asarray(p["features"], dtype=np.float32) for p in patient_data.values()])
+    return np.asarray(patient_data, dtype=np.float32)
+
+
+def _batches(traj: Dict[str, np.ndarray], batch_size: int, rng: np.random.Generator) -> Iterator[Dict[str, torch.Tensor]]:
+    order = rng.permutation(len(traj["reward"]))
+    for start in range(0, len(order), batch_size):
+        sel = order[start:start + batch_size]
+        yield {k: torch.from_numpy(v[sel]) for k, v in traj.items()}
+
+
+def update_from_batch(actor, critic, actor_opt, critic_opt, batch: Dict[str, torch.Tensor], gamma=0.99):
+    """train_ppo의 critic / actor update를 batch 단위로 수행"""
+    state = batch["state"]
+    action_idx = batch["action_idx"]
+    delta = batch["delta"]
+
+    # 1) CRITIC UPDATE
+    value = critic(state, action_idx, delta)
+    with torch.no_grad():
+        next_value = critic(batch["next_state"], action_idx, delta)
+        target = batch["reward"].unsqueeze(1) + gamma * next_value * (1 - batch["done"].unsqueeze(1))
+    critic_loss = ((value - target) ** 2).mean()
+
+    critic_opt.zero_grad()
+    critic_loss.backward()
+    critic_opt.step()
+
+    # 2) ACTOR UPDATE (actor-only graph로 새 forward)
+    new_action_idx, new_delta = actor.act(state)
+    actor_loss = -critic(state, new_action_idx, new_delta).mean()
+
+    actor_opt.zero_grad()
+    actor_loss.backward()
+    actor_opt.step()
+    return critic_loss.item(), actor_loss.item()
+
+
+def train_ppo_parallel(
+    actor: HybridActor,
+    critic: HybridCritic,
+    patient_data: Any,
+    col_minmax: Dict[int, Tuple[float, float]],
+    epochs=10,
+    gamma=0.99,
+    lr=1e-3,
+    alpha=5,
+    max_steps=8,
+    num_workers: Optional[int] = None,
+    shard_size=64,
+    batch_size=256,
+    weights_path: str = DEFAULT_WEIGHTS,
+    seed=1,
+) -> List[Dict[str, float]]:
+    """
+    train_ppo의 multi-process 버전.
+    epoch마다 actor weight를 worker에 보내고, shard 결과가 도착하는 순서대로 batch update.
+    """
+    features = _features_array(patient_data)
+    num_workers = num_workers or os.cpu_count() or 1
+    shards = [features[i:i + shard_size] for i in range(0, len(features), shard_size)]
+    rng = np.random.default_rng(seed)
+
+    actor.set_bounds(col_minmax)
+    actor_opt = optim.Adam(actor.parameters(), lr=lr)
+    critic_opt = optim.Adam(critic.parameters(), lr=lr)
+
+    history = []
+    ctx = mp.get_context("spawn")
+    with ProcessPoolExecutor(
+        max_workers=num_workers,
+        mp_context=ctx,
+        initializer=_init_worker,
+        initargs=(col_minmax, weights_path, max_steps),
+    ) as pool:
+        for epoch in range(epochs):
+            t0 = time.perf_counter()
+            actor_state = {k: v.detach().cpu() for k, v in actor.state_dict().items()}
+            futures = [
+                pool.submit(_run_shard, actor_state, shard, alpha, seed * 100003 + epoch * 1009 + i)
+                for i, shard in enumerate(shards)
+            ]
+
+            critic_losses, actor_losses, rewards = [], [], []
+            for fut in as_completed(futures):
+                traj = fut.result()
+                rewards.append(traj["reward"].mean())
+                for batch in _batches(traj, batch_size, rng):
+                    c_loss, a_loss = update_from_batch(actor, critic, actor_opt, critic_opt, batch, gamma)
+                    critic_losses.append(c_loss)
+                    actor_losses.append(a_loss)
+
+            stats = {
+                "epoch": epoch,
+                "critic_loss": float(np.mean(critic_losses)),
+                "actor_loss": float(np.mean(actor_losses)),
+                "mean_reward": float(np.mean(rewards)),
+                "seconds": time.perf_counter() - t0,
+            }
+            history.append(stats)
+            print(
+                f"epoch {epoch}: critic {stats['critic_loss']:.4f} actor {stats['actor_loss']:.4f} "
+                f"reward {stats['mean_reward']:.4f} ({stats['seconds']:.1f}s, {len(shards)} shards)"
+            )
+    return history
+
+
+def main():
+    import pandas as pd
+
+    parser = argparse.ArgumentParser(description="Train HybridActor with parallel rollout workers")
+    parser.add_argument("--epochs", type=int, default=5)
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--lr", type=float, default=3e-4)
+    parser.add_argument("--alpha", type=float, default=10)
+    parser.add_argument("--gamma", type=float, default=0.99)
+    parser.add_argument("--shard-size", type=int, default=64)
+    parser.add_argument("--batch-size", type=int, default=256)
+    parser.add_argument("--out", default=DEFAULT_ACTOR)
+    args = parser.parse_args()
+
+    X = pd.read_pickle(os.path.join(ROOT_DIR, "input.pkl"))
+    col_minmax = compute_col_minmax()
+
+    actor = HybridActor()
+    critic = HybridCritic()
+    train_ppo_parallel(
+        actor, critic, X.values, col_minmax,
+        epochs=args.epochs, gamma=args.gamma, lr=args.lr, alpha=args.alpha,
+        num_workers=args.workers, shard_size=args.shard_size, batch_size=args.batch_size,
+    )
+    torch.save(actor.state_dict(), args.out)
+    print(f"Saved actor to {args.out}")
+
+
+if __name__ == "__main__":
+    main()
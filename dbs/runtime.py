@@ -0,0 +1,99 @@
+"""
+CPU inference on exported artifacts (python -m dbs.export): TorchScript 또는 onnxruntime.
+
+MODEL_BACKEND=torchscript / onnx 이면 get_scorer() / get_actor()가 eager TotalModel / HybridActor 대신
+이 artifact들을 쓴다 (dbs.models class 코드 / Dropout 없이). 기본값 eager.
+
+    model = load_runtime_model("onnx")      # [B,34] tensor -> [B,3] logits (TotalModel과 같은 계약)
+    actor = load_runtime_actor("onnx")      # .act(states) -> (action_index [B], delta [B])
+"""
+import os
+from typing import Any, Optional, Tuple
+
+import numpy as np
+import torch
+
+from dbs.paths import DEFAULT_ACTOR_ONNX, DEFAULT_ACTOR_TS, DEFAULT_SCORER_ONNX, DEFAULT_SCORER_TS
+
+MODEL_BACKEND = os.getenv("MODEL_BACKEND", "eager")   # eager | torchscript | onnx
+
+ARTIFACTS = {
+    "torchscript": (DEFAULT_SCORER_TS, DEFAULT_ACTOR_TS),
+    "onnx": (DEFAULT_SCORER_ONNX, DEFAULT_ACTOR_ONNX),
+}
+
+
+def _artifact(backend: str, which: int, path: Optional[str]) -> str:
+    if backend not in ARTIFACTS:
+        raise ValueError(f"Unknown model backend: {backend} (expected one of {list(ARTIFACTS)})")
+    path = path or ARTIFACTS[backend][which]
+    if not os.path.exists(path):
+        raise FileNotFoundError(f"{path} not found; run `python -m dbs.export --format {backend}` first.")
+    return path
+
+
+def _onnx_session(path: str):
+    try:
+        import onnxruntime as ort
+    except ImportError as e:
+        raise RuntimeError("MODEL_BACKEND=onnx requires onnxruntime (pip install onnxruntime).") from e
+    return ort.InferenceSession(path, providers=["CPUExecutionProvider"])
+
+
+class OnnxModel:
+    """onnxruntime session을 torch module처럼: [B,34] tensor -> [B,3] logits tensor"""
+
+    def __init__(self, path: str):
+        self.path = path
+        self.session = _onnx_session(path)
+
+    def __call__(self, x: torch.Tensor) -> torch.Tensor:
+        states = x.detach().cpu().numpy().astype(np.float32, copy=False)
+        (logits,) = self.session.run(None, {"states": states})
+        return torch.from_numpy(logits)
+
+
+class RuntimeActor:
+    """
+    export된 actor (states, gumbel) -> (action_index, delta)를 HybridActor.act 자리에 쓸 수 있게.
+    Gumbel noise는 torch 전역 RNG로 만들어서 torch.manual_seed로 재현 가능 (eager와는 다른 sample 순서).
+    """
+
+    def __init__(self, backend: str, path: str):
+        self.backend = backend
+        self.path = path
+        if backend == "onnx":
+            self.session = _onnx_session(path)
+        else:
+            self.module = torch.jit.load(path, map_location="cpu")
+
+    def forward_noise(self, states: torch.Tensor, gumbel: torch.Tensor) -> Tuple[torch.Tensor, torch.Tensor]:
+        if self.backend == "onnx":
+            action_index, delta = self.session.run(None, {
+                "states": states.detach().cpu().numpy().astype(np.float32, copy=False),
+                "gumbel": gumbel.numpy().astype(np.float32, copy=False),
+            })
+            return torch.from_numpy(action_index), torch.from_numpy(delta)
+        return self.module(states, gumbel)
+
+    def act(self, states: torch.Tensor) -> Tuple[torch.Tensor, torch.Tensor]:
+        from dbs.export import sample_gumbel
+
+        if states.dim() == 1:
+            states = states.unsqueeze(0)
+        states = states.float().cpu()
+        return self.forward_noise(states, sample_gumbel(states.shape))
+
+    def eval(self) -> "RuntimeActor":
+        return self
+
+
+def load_runtime_model(backend: str, path: Optional[str] = None) -> Any:
+    path = _artifact(backend, 0, path)
+    if backend == "onnx":
+        return OnnxModel(path)
+    return torch.jit.load(path, map_location="cpu")
+
+
+def load_runtime_actor(backend: str, path: Optional[str] = None) -> RuntimeActor:
+    return RuntimeActor(backend, _artifact(backend, 1, path))
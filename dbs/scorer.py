@@ -0,0 +1,164 @@
+"""
+Process-wide DBS scoring service.
+
+TotalModel 가중치를 프로세스당 한 번만 로드해서 메모리에 유지한다.
+env reward, test_patient, Streamlit app 모두 get_scorer()를 통해 점수를 계산한다.
+"""
+import threading
+import time
+from typing import Any, Dict, Optional, Union
+
+import numpy as np
+import torch
+
+from dbs.models import TotalModel
+from dbs.paths import DEFAULT_WEIGHTS
+from dbs.runtime import ARTIFACTS, MODEL_BACKEND, load_runtime_model
+
+
+def default_device() -> torch.device:
+    return torch.device('cuda:0' if torch.cuda.is_available() else 'cpu')
+
+
+def probs_to_score(prob: torch.Tensor) -> torch.Tensor:
+    """[B,3] softmax 확률 -> [B] dbs score (0~100)"""
+    return (prob[:, 1] + prob[:, 2] * 2) * 50
+
+
+class ScoringService:
+    def __init__(
+        self,
+        weights_path: Optional[str] = None,
+        device: Optional[torch.device] = None,
+        backend: str = "eager",
+    ):
+        """
+        backend: eager (TotalModel + state_dict) 또는 torchscript / onnx (dbs.export artifact, CPU)
+        weights_path: None이면 backend의 기본 파일 (model/best_model.pt, model/total_model.ts, ...)
+        """
+        self.backend = backend
+        self.device = device or default_device()
+        if backend != "eager":
+            self.device = torch.device("cpu")
+        self.weights_path: Optional[str] = None   # 마지막으로 읽은 실제 파일 (load()가 다시 읽는 경로)
+        self.source: Optional[str] = None         # 현재 모델의 출처: 파일 경로 또는 "<state_dict>"
+        self.model: Optional[Any] = None
+        self.load_time = 0.0
+
+        self._lock = threading.Lock()
+        self.calls = 0
+        self.rows = 0
+        self.total_latency = 0.0
+        self.last_latency = 0.0
+
+        self.load(weights_path)
+
+    def _build(self, state_dict: Dict[str, torch.Tensor]) -> TotalModel:
+        model = TotalModel(0.35, 0.35, 1)
+        model.load_state_dict(state_dict)
+        model = model.to(self.device)
+        model.eval()
+        return model
+
+    def load(self, weights: Union[str, Dict[str, torch.Tensor], None] = None) -> "ScoringService":
+        """
+        가중치 로드 / hot-swap.
+        weights: 파일 경로 또는 state_dict (None이면 마지막으로 읽은 파일 weights_path 다시 읽기,
+        state_dict로 swap한 뒤에도 weights_path는 그 전 파일 그대로)
+        새 모델을 완전히 만든 뒤에 교체하므로 score() 호출 중에도 안전하다.
+        """
+        t0 = time.perf_counter()
+        if weights is None:
+            if self.weights_path is None and self.source == "<state_dict>":
+                raise ValueError("Scoring model was loaded from a state_dict only; pass a weights path to reload.")
+            weights = self.weights_path
+        if self.backend != "eager":
+            if not (weights is None or isinstance(weights, str)):
+                raise ValueError(f"{self.backend} backend loads exported artifacts, not state_dicts")
+            path = weights or ARTIFACTS[self.backend][0]
+            model = load_runtime_model(self.backend, path)
+            source = path
+        else:
+            weights = weights or DEFAULT_WEIGHTS
+            if isinstance(weights, str):
+                state_dict = torch.load(weights, map_location=self.device)
+                path = source = weights
+            else:
+                state_dict = weights
+                path, source = self.weights_path, "<state_dict>"
+            model = self._build(state_dict)
+
+        with self._lock:
+            self.model = model
+            self.weights_path = path
+            self.source = source
+            self.load_time = time.perf_counter() - t0
+        print(f"Scoring model loaded from {source} in {self.load_time * 1000:.1f} ms")
+        return self
+
+    swap = load
+
+    def score_tensor(self, x: torch.Tensor) -> torch.Tensor:
+        """[B,34] tensor -> [B] score tensor (device 위에 그대로)"""
+        model = self.model
+        with torch.no_grad():
+            output = model(x.to(self.device, torch.float32))
+            prob = torch.softmax(output, dim=1)
+        return probs_to_score(prob)
+
+    def score(self, batch: Any) -> np.ndarray:
+        """
+        batch: [34] 또는 [B,34] (np.ndarray / torch.Tensor / list)
+        return: [B] float ndarray
+        """
+        t0 = time.perf_counter()
+        if isinstance(batch, torch.Tensor):
+            x = batch.detach().float()
+        else:
+            x = torch.as_tensor(np.asarray(batch, dtype=np.float32))
+        if x.ndim == 1:
+            x = x.unsqueeze(0)
+
+        scores = self.score_tensor(x).cpu().numpy()
+
+        dt = time.perf_counter() - t0
+        with self._lock:
+            self.calls += 1
+            self.rows += x.shape[0]
+            self.total_latency += dt
+            self.last_latency = dt
+        return scores
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            mean = self.total_latency / self.calls if self.calls else 0.0
+            return {
+                "weights_path": self.weights_path,
+                "source": self.source,
+                "backend": self.backend,
+                "device": str(self.device),
+                "load_time_ms": self.load_time * 1000,
+                "calls": self.calls,
+                "rows": self.rows,
+                "mean_latency_ms": mean * 1000,
+                "last_latency_ms": self.last_latency * 1000,
+            }
+
+
+_scorer: Optional[ScoringService] = None
+_scorer_lock = threading.Lock()
+
+
+def get_scorer() -> ScoringService:
+    """프로세스 전역 ScoringService (처음 호출할 때 한 번만 로드, MODEL_BACKEND)"""
+    global _scorer
+    if _scorer is None:
+        with _scorer_lock:
+            if _scorer is None:
+                _scorer = ScoringService(backend=MODEL_BACKEND)
+    return _scorer
+
+
+def scoring(state_input) -> float:
+    """[34] / [1,34] state -> dbs score (float), 전역 scorer 사용"""
+    return float(get_scorer().score(state_input)[0])
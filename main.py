@@ -1,19 +1,35 @@
+import asyncio
+import contextlib
+import hashlib
 import os
 import re
 import json
-from typing import List, Dict, Any
+from typing import List, Dict, Any, AsyncIterator, Iterator, Optional, Tuple
 
-from dotenv import load_dotenv
-from openai import OpenAI
-import chromadb
-from chromadb.api.types import EmbeddingFunction
+# corpus / embedding / vectorstore helpers live in rag/, re-exported here for existing callers
+from rag.corpus import FILE_METADATA, chunk_text, chunk_text_by_headings
+from rag.embeddings import BaseEmbeddingFunction, OpenAIEmbeddingFunction, get_embedding_function
+from rag.prompt import PROMPT_TOKEN_BUDGET, count_tokens, dedup_evidence
+from rag.resources import get_rag_resources
+from rag.response_cache import get_response_cache, request_key
+
+# Chroma helpers: re-exported lazily so `import main` (memory backend) never imports chromadb
+_VECTORSTORE_EXPORTS = {"build_where", "get_or_build_vectorstore", "retrieve_guidelines", "retrieve_guidelines_batch"}
+
+
+def __getattr__(name):
+    if name in _VECTORSTORE_EXPORTS:
+        import rag.vectorstore
+
+        return getattr(rag.vectorstore, name)
+    raise AttributeError(f"module 'main' has no attribute {name!r}")
 
 # ----------------- CONFIG -----------------
-FILE_METADATA = {
-    "ADA_Behaviors.txt": {"domain": "behaviors", "population": "adults"},
-    "ADA_OlderAdults.txt": {"domain": "older_adults", "population": "older_adults"},
-    "ADA_Obesity.txt": {"domain": "obesity", "population": "adults"},
-}
+LLM_MODEL = "gpt-4.1-mini"
+LLM_TEMPERATURE = 0.2
+LLM_MAX_TOKENS = 1500
+PROMPT_VERSION = 2  # bump whenever build_llm_messages changes (part of the response cache key)
+LLM_CONCURRENCY = int(os.getenv("LLM_CONCURRENCY", "8"))  # patients in flight per worker (batch)
 
 # Map variable names (lowercase) to guideline domains
 VARIABLE_TO_DOMAIN = {
@@ -51,99 +67,6 @@ result = {
     "new_score":93.0
 }
 
-# ----------------- HELPERS -----------------
-def chunk_text_by_headings(
-    text: str,
-    max_chars: int = 900,
-    overlap: int = 120,
-) -> List[str]:
-    lines = text.splitlines()
-    heading_pattern = re.compile(r"^(#{1,4})\s+.+")  # #, ##, ###, #### + space + text
-
-    sections: List[str] = []
-    current_section: List[str] = []
-
-    for line in lines:
-        if heading_pattern.match(line):
-            if current_section:
-                section_text = "\n".join(current_section).strip()
-                if section_text:
-                    sections.append(section_text)
-                current_section = []
-            current_section.append(line)
-        else:
-            current_section.append(line)
-
-    if current_section:
-        section_text = "\n".join(current_section).strip()
-        if section_text:
-            sections.append(section_text)
-
-    chunks: List[str] = []
-    for sec in sections:
-        if len(sec) <= max_chars:
-            chunks.append(sec)
-        else:
-            start = 0
-            while start < len(sec):
-                end = start + max_chars
-                chunk = sec[start:end]
-                chunks.append(chunk)
-                start += max_chars - overlap
-
-    return chunks
-
-
-def chunk_text(text: str, size: int = 900, overlap: int = 120) -> List[str]:
-    return chunk_text_by_headings(text, max_chars=size, overlap=overlap)
-
-
-class OpenAIEmbeddingFunction(EmbeddingFunction):
-    def __init__(self, model: str = "text-embedding-3-small"):
-        self.client = OpenAI()
-        self.model = model
-
-    def __call__(self, input: List[str]):
-        if isinstance(input, str):
-            texts = [input]
-        else:
-            texts = input
-        resp = self.client.embeddings.create(model=self.model, input=texts)
-        return [d.embedding for d in resp.data]
-
-
-def get_or_build_vectorstore():
-    db_path = "chroma_db"
-    os.makedirs(db_path, exist_ok=True)
-    client = chromadb.PersistentClient(path=db_path)
-    emb = OpenAIEmbeddingFunction()
-
-    try:
-        col = client.get_collection("ada", embedding_function=emb)
-        print("Found existing 'ada' collection. Reusing vectorstore.")
-        return col
-    except Exception:
-        print("No existing 'ada' collection. Building vectorstore from scratch...")
-
-    col = client.create_collection(name="ada", embedding_function=emb)
-
-    for fname in os.listdir("resources"):
-        if not fname.endswith(".txt"):
-            continue
-        with open(os.path.join("resources", fname), "r", encoding="utf-8") as f:
-            text = f.read()
-
-        chunks = chunk_text(text, size=900, overlap=120)
-        meta = FILE_METADATA.get(fname, {})
-
-        for i, ch in enumerate(chunks):
-            col.add(ids=[f"{fname}_{i}"], documents=[ch], metadatas=[meta])
-
-        print(f"Loaded {fname}: {len(chunks)} chunks")
-
-    print("Vectorstore build complete.")
-    return col
-
 
 def build_rl_actions_from_dict(output_dict: Dict[str, Any]) -> List[Dict[str, str]]:
     week_pattern = re.compile(r"(\d+)week$")
@@ -192,30 +115,12 @@ def build_rl_actions_from_dict(output_dict: Dict[str, Any]) -> List[Dict[str, st
     return rl_actions
 
 
-def retrieve_guidelines(collection, domain: str, population: str, query: str) -> str:
-    conds = []
-    if domain:
-        conds.append({"domain": {"$eq": domain}})
-    if population:
-        conds.append({"population": {"$eq": population}})
-
-    if conds:
-        where = {"$and": conds}
-        res = collection.query(query_texts=[query], n_results=4, where=where)
-    else:
-        res = collection.query(query_texts=[query], n_results=4)
-
-    docs = res.get("documents", [[]])[0] or []
-    return "\n\n".join(docs)
-
-
-def llm_generate(
+def build_llm_messages(
     clinical: str,
     context: str,
     rl_actions: List[Dict],
     evidence_blocks: List[Dict],
-) -> str:
-    client = OpenAI()
+) -> List[Dict[str, str]]:
 
     system_prompt = (
         "You are a warm, supportive diabetes lifestyle coach who ALWAYS stays inside ADA guidelines. "
@@ -244,11 +149,17 @@ def llm_generate(
         "- Stay consistent with ADA Standards of Care for lifestyle and behavior."
     )
 
+    try:
+        clinical_info = json.loads(clinical)  # nested object instead of an escaped, indented string
+    except ValueError:
+        clinical_info = clinical
+
     user_prompt = {
-        "clinical_info": clinical,
+        "clinical_info": clinical_info,
         "patient_context": context,
         "rl_actions": rl_actions,
-        "evidence": evidence_blocks,
+        "evidence_chunks": [],
+        "evidence_by_action": [],
         "task": (
             "Write a numbered list, one item per RL action, speaking DIRECTLY to the patient.\n\n"
             "For each item, use this structure with VERY clear labels and short paragraphs:\n\n"
@@ -269,38 +180,102 @@ def llm_generate(
             "        in the direction suggested by 'delta' (up or down).\n"
             "- 'How this fits ADA guidelines:' 1 short sentence saying this matches ADA diabetes lifestyle guidance, in plain language "
             "(for example, 'This fits ADA diabetes guidelines that encourage healthy daily habits to support your health over time.').\n\n"
-            "Keep each item under about 120–150 words. Avoid technical jargon. Do NOT talk to a clinician; talk directly to the patient."
+            "Keep each item under about 120–150 words. Avoid technical jargon. Do NOT talk to a clinician; talk directly to the patient.\n\n"
+            "Each ADA evidence chunk appears once in 'evidence_chunks' with a ref like 'E1'; "
+            "'evidence_by_action' lists the refs that apply to each RL action."
         ),
     }
 
+    # evidence gets whatever the rest of the prompt leaves of PROMPT_TOKEN_BUDGET,
+    # each chunk once even if several actions retrieved it
+    base_tokens = count_tokens(system_prompt) + count_tokens(json.dumps(user_prompt, ensure_ascii=False))
+    chunks, by_action = dedup_evidence(evidence_blocks, budget=max(0, PROMPT_TOKEN_BUDGET - base_tokens))
+    user_prompt["evidence_chunks"] = chunks
+    user_prompt["evidence_by_action"] = by_action
+
+    return [
+        {"role": "system", "content": system_prompt},
+        {"role": "user", "content": json.dumps(user_prompt, ensure_ascii=False, separators=(",", ":"))},
+    ]
+
+
+def llm_generate(
+    clinical: str,
+    context: str,
+    rl_actions: List[Dict],
+    evidence_blocks: List[Dict],
+) -> str:
+    client = get_rag_resources().openai  # pooled, shared with the embedding backend
     resp = client.chat.completions.create(
-        model="gpt-4.1-mini",
-        messages=[
-            {"role": "system", "content": system_prompt},
-            {"role": "user", "content": json.dumps(user_prompt)},
-        ],
-        temperature=0.2,
-        max_tokens=1500,
+        model=LLM_MODEL,
+        messages=build_llm_messages(clinical, context, rl_actions, evidence_blocks),
+        temperature=LLM_TEMPERATURE,
+        max_tokens=LLM_MAX_TOKENS,
     )
     return resp.choices[0].message.content
 
 
+async def llm_generate_async(
+    clinical: str,
+    context: str,
+    rl_actions: List[Dict],
+    evidence_blocks: List[Dict],
+) -> str:
+    client = get_rag_resources().async_openai
+    resp = await client.chat.completions.create(
+        model=LLM_MODEL,
+        messages=build_llm_messages(clinical, context, rl_actions, evidence_blocks),
+        temperature=LLM_TEMPERATURE,
+        max_tokens=LLM_MAX_TOKENS,
+    )
+    return resp.choices[0].message.content
+
+
+def llm_generate_stream(
+    clinical: str,
+    context: str,
+    rl_actions: List[Dict],
+    evidence_blocks: List[Dict],
+) -> Iterator[str]:
+    """Same request as llm_generate, yielding text deltas as they arrive."""
+    client = get_rag_resources().openai
+    stream = client.chat.completions.create(
+        model=LLM_MODEL,
+        messages=build_llm_messages(clinical, context, rl_actions, evidence_blocks),
+        temperature=LLM_TEMPERATURE,
+        max_tokens=LLM_MAX_TOKENS,
+        stream=True,
+    )
+    for chunk in stream:
+        if chunk.choices and chunk.choices[0].delta.content:
+            yield chunk.choices[0].delta.content
+
+
+async def llm_generate_stream_async(
+    clinical: str,
+    context: str,
+    rl_actions: List[Dict],
+    evidence_blocks: List[Dict],
+) -> AsyncIterator[str]:
+    client = get_rag_resources().async_openai
+    stream = await client.chat.completions.create(
+        model=LLM_MODEL,
+        messages=build_llm_messages(clinical, context, rl_actions, evidence_blocks),
+        temperature=LLM_TEMPERATURE,
+        max_tokens=LLM_MAX_TOKENS,
+        stream=True,
+    )
+    async for chunk in stream:
+        if chunk.choices and chunk.choices[0].delta.content:
+            yield chunk.choices[0].delta.content
+
+
 # ----------------- PUBLIC API FUNCTION -----------------
-def get_llm_recommendation(info: Dict[str, Any]) -> str:
+def prepare_recommendation(info: Dict[str, Any]) -> Tuple[str, str, List[Dict[str, str]], List[Dict]]:
     """
-    End-to-end pipeline:
-    - Builds/loads vectorstore
-    - Parses clinical vars, context, and RL actions from `info`
-    - Retrieves ADA evidence for each RL action
-    - Calls LLM to generate recommendations
-    - Returns a single text string with recommendation + evidence
+    `info` (test_patient output + context) -> (clinical json, context, rl_actions, evidence_blocks).
+    evidence_blocks carry the retrieval "query" until evidence is attached.
     """
-    load_dotenv()
-    if not os.getenv("OPENAI_API_KEY"):
-        raise RuntimeError("OPENAI_API_KEY not found. Put it in a .env file.")
-
-    collection = get_or_build_vectorstore()
-
     output_dict: Dict[str, Any] = info
 
     week_pattern = re.compile(r"\d+week$")
@@ -335,20 +310,66 @@ def get_llm_recommendation(info: Dict[str, Any]) -> str:
             domain = "behaviors"
 
         q = f"ADA guideline for {var}, lifestyle change, diabetes, feasibility"
-        ev = retrieve_guidelines(collection, domain, pop, q)
         evidence_blocks.append(
-            {"variable": var, "domain": domain, "population": pop, "evidence": ev}
+            {"variable": var, "domain": domain, "population": pop, "query": q}
         )
 
-    final_output = llm_generate(clinical, context, rl_actions, evidence_blocks)
+    return clinical, context, rl_actions, evidence_blocks
+
+
+def attach_evidence(evidence_blocks: List[Dict], hits: List[List[Tuple[str, str]]]) -> List[Dict]:
+    """Attach retrieve_chunks hits [(chunk id, text)] to each block as "evidence" (joined text) and "chunks"."""
+    for block, h in zip(evidence_blocks, hits):
+        del block["query"]
+        block["evidence"] = "\n\n".join(doc for _, doc in h)
+        block["chunks"] = h
+    return evidence_blocks
+
+
+def recommendation_key(clinical: str, context: str, rl_actions: List[Dict], evidence_blocks: List[Dict]) -> str:
+    """
+    Response cache key: same inputs + same evidence chunks + same model / prompt -> same text.
+    Chunk ids are positional ("<file>_<i>"), so after a guideline edit and re-index the same id can
+    point at different text; the key therefore includes a hash of each chunk's text. The prompt token
+    budget is included too, since it changes which evidence ends up in the prompt.
+    """
+    return request_key(
+        clinical=json.loads(clinical),
+        context=context,
+        rl_actions=rl_actions,
+        evidence=[
+            [[cid, hashlib.sha256(doc.encode("utf-8")).hexdigest()] for cid, doc in b["chunks"]]
+            for b in evidence_blocks
+        ],
+        model=LLM_MODEL,
+        temperature=LLM_TEMPERATURE,
+        max_tokens=LLM_MAX_TOKENS,
+        prompt_version=PROMPT_VERSION,
+        prompt_token_budget=PROMPT_TOKEN_BUDGET,
+    )
+
 
+def _cached_stream(tokens: Iterator[str], cache, key: str) -> Iterator[str]:
+    # pass deltas through, store the full text once the stream completes
+    parts = []
+    for tok in tokens:
+        parts.append(tok)
+        yield tok
+    cache.put(key, "".join(parts))
+
+
+def format_evidence(evidence_blocks: List[Dict]) -> str:
     evidence_text_parts = []
     for i, ev in enumerate(evidence_blocks, start=1):
         block = ev["evidence"] or "(No evidence chunks retrieved)"
         evidence_text_parts.append(
             f"--- RL Action {i}: {ev['variable']} ---\n{block}"
         )
-    evidence_text = "\n\n".join(evidence_text_parts)
+    return "\n\n".join(evidence_text_parts)
+
+
+def format_recommendation(final_output: str, evidence_blocks: List[Dict]) -> str:
+    evidence_text = format_evidence(evidence_blocks)
 
     combined = (
         "FINAL RECOMMENDATION\n"
@@ -362,6 +383,74 @@ def get_llm_recommendation(info: Dict[str, Any]) -> str:
     return combined
 
 
+async def get_llm_recommendation_async(
+    info: Dict[str, Any],
+    semaphore: Optional[asyncio.Semaphore] = None,
+) -> str:
+    """
+    End-to-end pipeline (async):
+    - Parses clinical vars, context, and RL actions from `info`
+    - Retrieves ADA evidence for all RL actions at once (worker thread, off the event loop)
+    - Calls the LLM with the async OpenAI client
+    - Returns a single text string with recommendation + evidence
+    `semaphore` bounds how many patients are in flight at once (batch callers).
+    """
+    # OpenAI clients, embedding function and retriever are created once per process
+    resources = get_rag_resources()
+
+    async with semaphore or contextlib.nullcontext():
+        clinical, context, rl_actions, evidence_blocks = prepare_recommendation(info)
+
+        # one embedding request + one query per distinct (domain, population) filter
+        # RETRIEVAL_BACKEND=memory (default): in-process dense + BM25 hybrid index, chroma: Chroma PersistentClient (dense only)
+        hits = await asyncio.to_thread(resources.retrieve_chunks, evidence_blocks)
+        attach_evidence(evidence_blocks, hits)
+
+        # identical request (same inputs, evidence, model, prompt) -> cached text, no LLM call
+        cache = get_response_cache()
+        key = recommendation_key(clinical, context, rl_actions, evidence_blocks)
+        final_output = cache.get(key) if cache else None
+        if final_output is None:
+            final_output = await llm_generate_async(clinical, context, rl_actions, evidence_blocks)
+            if cache:
+                cache.put(key, final_output)
+    return format_recommendation(final_output, evidence_blocks)
+
+
+async def get_llm_recommendations_async(
+    infos: List[Dict[str, Any]],
+    concurrency: int = LLM_CONCURRENCY,
+) -> List[str]:
+    """Many patients on one event loop, at most `concurrency` in flight."""
+    semaphore = asyncio.Semaphore(concurrency)
+    return await asyncio.gather(*(get_llm_recommendation_async(info, semaphore) for info in infos))
+
+
+def stream_llm_recommendation(info: Dict[str, Any]) -> Tuple[List[Dict], Iterator[str]]:
+    """
+    Streaming pipeline for the UI:
+    retrieval runs now, so the evidence can be shown right away;
+    the returned iterator starts the LLM request when first consumed and yields text deltas.
+    """
+    resources = get_rag_resources()
+    clinical, context, rl_actions, evidence_blocks = prepare_recommendation(info)
+    attach_evidence(evidence_blocks, resources.retrieve_chunks(evidence_blocks))
+
+    cache = get_response_cache()
+    if cache is None:
+        return evidence_blocks, llm_generate_stream(clinical, context, rl_actions, evidence_blocks)
+    key = recommendation_key(clinical, context, rl_actions, evidence_blocks)
+    cached = cache.get(key)
+    if cached is not None:
+        return evidence_blocks, iter([cached])
+    return evidence_blocks, _cached_stream(llm_generate_stream(clinical, context, rl_actions, evidence_blocks), cache, key)
+
+
+def get_llm_recommendation(info: Dict[str, Any]) -> str:
+    """Sync wrapper: runs get_llm_recommendation_async on the process-wide event loop."""
+    return get_rag_resources().run(get_llm_recommendation_async(info))
+
+
 # ----------------- CLI ENTRYPOINT -----------------
 def main():
     print(">>> main() was called")
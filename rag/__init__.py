@@ -0,0 +1,3 @@
+"""
+Retrieval helpers for the ADA guideline RAG pipeline in main.py.
+"""
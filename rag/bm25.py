@@ -0,0 +1,62 @@
+"""
+Okapi BM25 over guideline chunks (prebuilt inverted index).
+
+"A1C", "triglycerides", "LDL" 같은 임상 용어는 embedding만으로는 잘 안 잡혀서
+dense score와 섞어 쓴다 (rag.index.InMemoryIndex.search).
+"""
+import math
+from typing import Dict, List, Sequence, Tuple
+
+import numpy as np
+
+from rag.embeddings import TOKEN_PATTERN
+
+# 너무 흔해서 점수에 도움이 안 되는 query 단어 (IDF가 낮긴 하지만 query마다 붙는 문구라 뺀다)
+STOPWORDS = frozenset(
+    "a an and are as at be by for from in is it of on or that the to with".split()
+)
+
+
+def tokenize(text: str) -> List[str]:
+    return [t for t in TOKEN_PATTERN.findall(text.lower()) if t not in STOPWORDS]
+
+
+class BM25Index:
+    def __init__(self, docs: Sequence[str], k1: float = 1.5, b: float = 0.75):
+        self.k1 = k1
+        self.b = b
+        self.n_docs = len(docs)
+
+        postings: Dict[str, Dict[int, int]] = {}
+        lengths = np.zeros(self.n_docs, dtype=np.float32)
+        for row, doc in enumerate(docs):
+            tokens = tokenize(doc)
+            lengths[row] = len(tokens)
+            for t in tokens:
+                tf = postings.setdefault(t, {})
+                tf[row] = tf.get(row, 0) + 1
+
+        avg_len = float(lengths.mean()) if self.n_docs else 0.0
+        # BM25 length normalization은 문서마다 고정이라 미리 계산
+        self.norm = k1 * (1 - b + b * lengths / avg_len) if avg_len else np.full(self.n_docs, k1, dtype=np.float32)
+
+        # term -> (rows, tf) 배열, idf
+        self.postings: Dict[str, Tuple[np.ndarray, np.ndarray]] = {}
+        self.idf: Dict[str, float] = {}
+        for term, tf in postings.items():
+            rows = np.fromiter(tf.keys(), dtype=np.int64, count=len(tf))
+            freqs = np.fromiter(tf.values(), dtype=np.float32, count=len(tf))
+            self.postings[term] = (rows, freqs)
+            df = len(tf)
+            self.idf[term] = math.log(1 + (self.n_docs - df + 0.5) / (df + 0.5))
+
+    def scores(self, query: str) -> np.ndarray:
+        """query -> 모든 문서의 BM25 score [n_docs] (query term의 posting list만 본다)"""
+        out = np.zeros(self.n_docs, dtype=np.float32)
+        for term in set(tokenize(query)):
+            posting = self.postings.get(term)
+            if posting is None:
+                continue
+            rows, tf = posting
+            out[rows] += self.idf[term] * tf * (self.k1 + 1) / (tf + self.norm[rows])
+        return out
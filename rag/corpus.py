@@ -0,0 +1,117 @@
+"""
+ADA guideline corpus: resources/*.txt -> heading-aware chunks + FILE_METADATA tags.
+"""
+import hashlib
+import json
+import os
+import re
+from typing import Dict, List, Tuple
+
+RESOURCES_DIR = "resources"
+
+FILE_METADATA = {
+    "ADA_Behaviors.txt": {"domain": "behaviors", "population": "adults"},
+    "ADA_OlderAdults.txt": {"domain": "older_adults", "population": "older_adults"},
+    "ADA_Obesity.txt": {"domain": "obesity", "population": "adults"},
+}
+
+CHUNK_SIZE = 900
+CHUNK_OVERLAP = 120
+
+
+def chunk_text_by_headings(
+    text: str,
+    max_chars: int = 900,
+    overlap: int = 120,
+) -> List[str]:
+    lines = text.splitlines()
+    heading_pattern = re.compile(r"^(#{1,4})\s+.+")  # #, ##, ###, #### + space + text
+
+    sections: List[str] = []
+    current_section: List[str] = []
+
+    for line in lines:
+        if heading_pattern.match(line):
+            if current_section:
+                section_text = "\n".join(current_section).strip()
+                if section_text:
+                    sections.append(section_text)
+                current_section = []
+            current_section.append(line)
+        else:
+            current_section.append(line)
+
+    if current_section:
+        section_text = "\n".join(current_section).strip()
+        if section_text:
+            sections.append(section_text)
+
+    chunks: List[str] = []
+    for sec in sections:
+        if len(sec) <= max_chars:
+            chunks.append(sec)
+        else:
+            start = 0
+            while start < len(sec):
+                end = start + max_chars
+                chunk = sec[start:end]
+                chunks.append(chunk)
+                start += max_chars - overlap
+
+    return chunks
+
+
+def chunk_text(text: str, size: int = 900, overlap: int = 120) -> List[str]:
+    return chunk_text_by_headings(text, max_chars=size, overlap=overlap)
+
+
+def chunk_params() -> Dict[str, int]:
+    """manifest에 같이 저장 -> 바뀌면 모든 파일을 다시 chunking"""
+    return {"chunk_size": CHUNK_SIZE, "chunk_overlap": CHUNK_OVERLAP}
+
+
+def list_resource_files(resources_dir: str = RESOURCES_DIR) -> List[str]:
+    return [f for f in sorted(os.listdir(resources_dir)) if f.endswith(".txt")]
+
+
+def file_fingerprint(fname: str, resources_dir: str = RESOURCES_DIR) -> str:
+    """파일 내용 + FILE_METADATA 태그의 sha256 (태그가 바뀌어도 chunk metadata를 다시 써야 한다)"""
+    h = hashlib.sha256()
+    with open(os.path.join(resources_dir, fname), "rb") as f:
+        h.update(f.read())
+    h.update(json.dumps(FILE_METADATA.get(fname, {}), sort_keys=True).encode("utf-8"))
+    return h.hexdigest()
+
+
+def load_file_chunks(
+    fname: str,
+    resources_dir: str = RESOURCES_DIR,
+) -> Tuple[List[str], List[str], List[Dict[str, str]]]:
+    """resources/<fname> -> (ids, documents, metadatas), ids are '<file>_<i>'"""
+    with open(os.path.join(resources_dir, fname), "r", encoding="utf-8") as f:
+        text = f.read()
+
+    chunks = chunk_text(text, size=CHUNK_SIZE, overlap=CHUNK_OVERLAP)
+    # source는 항상 붙인다 (FILE_METADATA에 없는 파일도 chroma가 빈 metadata를 거부하지 않게)
+    meta = {**FILE_METADATA.get(fname, {}), "source": fname}
+    ids = [f"{fname}_{i}" for i in range(len(chunks))]
+    return ids, chunks, [meta] * len(chunks)
+
+
+def load_chunks(
+    resources_dir: str = RESOURCES_DIR,
+    verbose: bool = True,
+) -> Tuple[List[str], List[str], List[Dict[str, str]]]:
+    """resources/*.txt -> (ids, documents, metadatas), ids are '<file>_<i>'"""
+    ids: List[str] = []
+    docs: List[str] = []
+    metas: List[Dict[str, str]] = []
+    for fname in list_resource_files(resources_dir):
+        file_ids, chunks, file_metas = load_file_chunks(fname, resources_dir)
+        ids += file_ids
+        docs += chunks
+        metas += file_metas
+
+        if verbose:
+            print(f"Loaded {fname}: {len(chunks)} chunks")
+    return ids, docs, metas
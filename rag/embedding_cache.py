@@ -0,0 +1,168 @@
+"""
+Content-addressed on-disk embedding cache.
+
+key = (model name, sha256(text)). SQLite에는 key -> (dim, slot, last_used)만 저장하고,
+벡터는 dim별 memory-mapped float32 행렬(vectors_<dim>.f32)의 slot 번째 행에 저장한다.
+max_entries를 넘으면 가장 오래 안 쓴 항목(LRU)의 slot을 재사용한다.
+
+여러 process (Streamlit app, service.py, dbs.batch)가 같은 디렉터리를 같이 쓴다:
+slot 할당 + 벡터 쓰기 + row insert는 BEGIN IMMEDIATE transaction 하나로 묶고,
+다른 process가 키운 행렬은 읽을 때 다시 mmap 한다.
+"""
+import hashlib
+import os
+import sqlite3
+import threading
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+
+DEFAULT_CACHE_DIR = os.getenv("EMBEDDING_CACHE_DIR", ".embedding_cache")
+DEFAULT_MAX_ENTRIES = int(os.getenv("EMBEDDING_CACHE_MAX_ENTRIES", "100000"))
+GROW_ROWS = 1024
+
+
+def text_key(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+class EmbeddingCache:
+    def __init__(self, path: str = DEFAULT_CACHE_DIR, max_entries: int = DEFAULT_MAX_ENTRIES):
+        self.path = path
+        self.max_entries = max_entries
+        os.makedirs(path, exist_ok=True)
+
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(os.path.join(path, "index.sqlite"), timeout=30, check_same_thread=False)
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS entries ("
+            " model TEXT NOT NULL, sha TEXT NOT NULL, dim INTEGER NOT NULL,"
+            " slot INTEGER NOT NULL, last_used INTEGER NOT NULL,"
+            " PRIMARY KEY (model, sha))"
+        )
+        self._db.execute("CREATE INDEX IF NOT EXISTS entries_lru ON entries (dim, last_used)")
+        self._db.commit()
+        self._clock = self._db.execute("SELECT COALESCE(MAX(last_used), 0) FROM entries").fetchone()[0]
+        self._mmaps: Dict[int, np.memmap] = {}
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    # ----------------- matrix storage -----------------
+    def _matrix(self, dim: int, min_rows: int = 0) -> np.memmap:
+        mm = self._mmaps.get(dim)
+        if mm is not None and mm.shape[0] >= min_rows:
+            return mm
+
+        fname = os.path.join(self.path, f"vectors_{dim}.f32")
+        row_bytes = dim * 4
+        size = os.path.getsize(fname) if os.path.exists(fname) else 0
+        rows = size // row_bytes
+        if rows < max(min_rows, 1):
+            rows = max(min_rows, 1) + GROW_ROWS
+            with open(fname, "ab") as f:
+                # 다른 process가 그 사이에 더 키웠으면 줄이지 않는다
+                rows = max(rows, os.fstat(f.fileno()).st_size // row_bytes)
+                f.truncate(rows * row_bytes)
+        if mm is not None:
+            mm.flush()
+        mm = np.memmap(fname, dtype=np.float32, mode="r+", shape=(rows, dim))
+        self._mmaps[dim] = mm
+        return mm
+
+    def _tick(self) -> int:
+        self._clock += 1
+        return self._clock
+
+    def _allocate_slot(self, dim: int) -> int:
+        count = self._db.execute("SELECT COUNT(*) FROM entries WHERE dim = ?", (dim,)).fetchone()[0]
+        if count < self.max_entries:
+            used = self._db.execute("SELECT COALESCE(MAX(slot), -1) FROM entries WHERE dim = ?", (dim,)).fetchone()[0]
+            return used + 1
+        # LRU eviction: 가장 오래된 항목의 slot 재사용
+        model, sha, slot = self._db.execute(
+            "SELECT model, sha, slot FROM entries WHERE dim = ? ORDER BY last_used LIMIT 1", (dim,)
+        ).fetchone()
+        self._db.execute("DELETE FROM entries WHERE model = ? AND sha = ?", (model, sha))
+        self.evictions += 1
+        return slot
+
+    # ----------------- public API -----------------
+    def get_many(self, model: str, texts: Sequence[str]) -> List[Optional[List[float]]]:
+        """texts 순서대로 cached embedding (없으면 None)"""
+        out: List[Optional[List[float]]] = []
+        with self._lock:
+            for text in texts:
+                sha = text_key(text)
+                row = self._db.execute(
+                    "SELECT dim, slot FROM entries WHERE model = ? AND sha = ?", (model, sha)
+                ).fetchone()
+                if row is None:
+                    self.misses += 1
+                    out.append(None)
+                    continue
+                dim, slot = row
+                self._db.execute(
+                    "UPDATE entries SET last_used = ? WHERE model = ? AND sha = ?", (self._tick(), model, sha)
+                )
+                # slot이 지금 mmap보다 뒤면 다른 process가 행렬을 키운 것 -> 다시 mmap
+                out.append(self._matrix(dim, slot + 1)[slot].tolist())
+                self.hits += 1
+            self._db.commit()
+        return out
+
+    def put_many(self, model: str, texts: Sequence[str], vectors: Sequence[Sequence[float]]):
+        with self._lock:
+            # 다른 process와 같은 slot을 받지 않도록 slot 할당부터 commit까지 write lock을 잡는다
+            self._db.execute("BEGIN IMMEDIATE")
+            try:
+                self._put_rows(model, texts, vectors)
+                for mm in self._mmaps.values():
+                    mm.flush()
+                self._db.commit()
+            except BaseException:
+                self._db.rollback()
+                raise
+
+    def _put_rows(self, model: str, texts: Sequence[str], vectors: Sequence[Sequence[float]]):
+        for text, vec in zip(texts, vectors):
+            sha = text_key(text)
+            arr = np.asarray(vec, dtype=np.float32)
+            dim = arr.shape[0]
+            row = self._db.execute(
+                "SELECT slot FROM entries WHERE model = ? AND sha = ? AND dim = ?", (model, sha, dim)
+            ).fetchone()
+            slot = row[0] if row else self._allocate_slot(dim)
+            self._matrix(dim, slot + 1)[slot] = arr
+            self._db.execute(
+                "INSERT OR REPLACE INTO entries (model, sha, dim, slot, last_used) VALUES (?, ?, ?, ?, ?)",
+                (model, sha, dim, slot, self._tick()),
+            )
+
+    def stats(self) -> Dict[str, float]:
+        with self._lock:
+            entries = self._db.execute("SELECT COUNT(*) FROM entries").fetchone()[0]
+            total = self.hits + self.misses
+            return {
+                "entries": entries,
+                "max_entries": self.max_entries,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": self.hits / total if total else 0.0,
+            }
+
+
+_cache: Optional[EmbeddingCache] = None
+_cache_lock = threading.Lock()
+
+
+def get_embedding_cache() -> EmbeddingCache:
+    """프로세스 전역 EmbeddingCache (EMBEDDING_CACHE_DIR, 기본 .embedding_cache/)"""
+    global _cache
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                _cache = EmbeddingCache()
+    return _cache
@@ -0,0 +1,271 @@
+"""
+Pluggable embedding backends for the ADA guideline vectorstore.
+
+EMBEDDING_BACKEND 환경변수로 선택:
+- "openai" (default): OpenAI text-embedding-3-small, network + OPENAI_API_KEY 필요
+- "hashing": 로컬 CPU hashed TF vectorizer (의존성 없음, 오프라인)
+- "sentence-transformers": 로컬 sentence-transformers 모델 (pip install sentence-transformers)
+
+backend / 모델마다 embedding 공간이 다르므로 collection도 backend + 모델별로 따로 쓴다 (collection_name, EMBEDDING_MODEL 포함).
+"""
+import hashlib
+import math
+import os
+import random
+import re
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Any, Callable, Iterator, List, Optional, Tuple
+
+import numpy as np
+
+from rag.embedding_cache import EmbeddingCache, get_embedding_cache
+
+# Bulk embedding when building the vectorstore
+EMBED_MAX_BATCH_TOKENS = 100_000   # per request (API limit is ~300k)
+EMBED_MAX_BATCH_SIZE = 2048        # inputs per request (API limit)
+EMBED_CONCURRENCY = 4
+EMBED_MAX_RETRIES = 5
+
+DEFAULT_OPENAI_MODEL = "text-embedding-3-small"
+
+
+def estimate_tokens(text: str) -> int:
+    # ~4 chars per token for English text; good enough for batching
+    return max(1, len(text) // 4)
+
+
+def batch_by_token_budget(
+    texts: List[str],
+    max_tokens: int = EMBED_MAX_BATCH_TOKENS,
+    max_items: int = EMBED_MAX_BATCH_SIZE,
+) -> List[List[int]]:
+    """Group text indices into batches that stay under the token / item budget."""
+    batches: List[List[int]] = []
+    current: List[int] = []
+    current_tokens = 0
+    for i, text in enumerate(texts):
+        n = estimate_tokens(text)
+        if current and (current_tokens + n > max_tokens or len(current) >= max_items):
+            batches.append(current)
+            current, current_tokens = [], 0
+        current.append(i)
+        current_tokens += n
+    if current:
+        batches.append(current)
+    return batches
+
+
+def with_retries(fn, *args, max_retries: int = EMBED_MAX_RETRIES, base_delay: float = 1.0):
+    """Call fn(*args), retrying transient OpenAI errors with exponential backoff + jitter."""
+    import openai
+
+    retryable = (
+        openai.RateLimitError,
+        openai.APIConnectionError,
+        openai.APITimeoutError,
+        openai.InternalServerError,
+    )
+    for attempt in range(max_retries + 1):
+        try:
+            return fn(*args)
+        except retryable as e:
+            if attempt == max_retries:
+                raise
+            delay = base_delay * (2 ** attempt) + random.uniform(0, base_delay)
+            print(f"Embedding request failed ({type(e).__name__}), retrying in {delay:.1f}s...")
+            time.sleep(delay)
+
+
+class BaseEmbeddingFunction:
+    """
+    Common cache + call plumbing. Subclasses set `backend` / `model` and implement _embed_remote.
+    chromadb를 import하지 않는다 (memory backend는 chromadb 없이 동작), Chroma에는 rag.vectorstore가 감싸서 넘긴다.
+    """
+
+    backend = "base"
+    model = ""
+    concurrency = 1
+
+    def _init_cache(self, cache: Optional[EmbeddingCache], use_cache: bool):
+        # content-addressed on-disk cache: identical chunk / query text is embedded once
+        self.cache = cache if cache is not None else (get_embedding_cache() if use_cache else None)
+
+    @property
+    def cache_model(self) -> str:
+        return f"{self.backend}:{self.model}"
+
+    @property
+    def collection_name(self) -> str:
+        slug = re.sub(r"[^a-zA-Z0-9]+", "_", f"{self.backend}_{self.model}").strip("_").lower()
+        return f"ada_{slug}"
+
+    def _embed_remote(self, texts: List[str]) -> List[List[float]]:
+        raise NotImplementedError
+
+    def embed(self, texts: List[str]) -> List[List[float]]:
+        if self.cache is None:
+            return self._embed_remote(texts)
+
+        vectors = self.cache.get_many(self.cache_model, texts)
+        missing = list(dict.fromkeys(t for t, v in zip(texts, vectors) if v is None))
+        if missing:
+            fresh = dict(zip(missing, self._embed_remote(missing)))
+            self.cache.put_many(self.cache_model, missing, [fresh[t] for t in missing])
+            vectors = [v if v is not None else fresh[t] for t, v in zip(texts, vectors)]
+        return vectors
+
+    def __call__(self, input: List[str]):
+        if isinstance(input, str):
+            texts = [input]
+        else:
+            texts = input
+        return self.embed(texts)
+
+
+class OpenAIEmbeddingFunction(BaseEmbeddingFunction):
+    backend = "openai"
+    concurrency = EMBED_CONCURRENCY
+
+    def __init__(
+        self,
+        model: str = DEFAULT_OPENAI_MODEL,
+        cache: Optional[EmbeddingCache] = None,
+        use_cache: bool = True,
+        client=None,
+        client_factory: Optional[Callable[[], Any]] = None,
+    ):
+        # 공유 client를 넘기면 connection pool도 같이 쓴다 (rag.resources는 client_factory로 넘김).
+        # client는 처음 embedding 요청을 보낼 때 만든다 -> cache hit만 있으면 OpenAI client / key 불필요
+        self._client = client
+        self._client_factory = client_factory
+        self.model = model
+        self._init_cache(cache, use_cache)
+
+    @property
+    def client(self):
+        if self._client is None:
+            if self._client_factory is not None:
+                self._client = self._client_factory()
+            else:
+                from openai import OpenAI
+
+                self._client = OpenAI()
+        return self._client
+
+    @property
+    def cache_model(self) -> str:
+        return self.model   # keep keys written before backends existed
+
+    @property
+    def collection_name(self) -> str:
+        # 기본 모델은 원래 collection 이름 그대로, EMBEDDING_MODEL로 바꾼 모델은 모델별 collection
+        if self.model == DEFAULT_OPENAI_MODEL:
+            return "ada"
+        return super().collection_name
+
+    def _embed_remote(self, texts: List[str]) -> List[List[float]]:
+        resp = with_retries(lambda: self.client.embeddings.create(model=self.model, input=texts))
+        return [d.embedding for d in resp.data]
+
+
+TOKEN_PATTERN = re.compile(r"[a-z0-9]+(?:[.\-][a-z0-9]+)*")
+
+
+class HashingEmbeddingFunction(BaseEmbeddingFunction):
+    """
+    Offline hashed term-frequency vectorizer (unigrams + bigrams, sublinear tf, L2-normalized).
+    No fitted vocabulary, so documents and queries embed consistently without any state.
+    """
+
+    backend = "hashing"
+
+    def __init__(self, dim: int = 2048, cache: Optional[EmbeddingCache] = None, use_cache: bool = False):
+        self.dim = dim
+        self.model = f"tf{dim}"
+        self._init_cache(cache, use_cache)
+
+    def _bucket(self, token: str) -> Tuple[int, float]:
+        h = int.from_bytes(hashlib.blake2b(token.encode("utf-8"), digest_size=8).digest(), "little")
+        return h % self.dim, (1.0 if (h >> 63) & 1 else -1.0)
+
+    def embed_one(self, text: str) -> np.ndarray:
+        tokens = TOKEN_PATTERN.findall(text.lower())
+        terms = tokens + [f"{a} {b}" for a, b in zip(tokens, tokens[1:])]
+        counts = {}
+        for t in terms:
+            counts[t] = counts.get(t, 0) + 1
+
+        vec = np.zeros(self.dim, dtype=np.float32)
+        for term, tf in counts.items():
+            idx, sign = self._bucket(term)
+            vec[idx] += sign * (1.0 + math.log(tf))
+        norm = np.linalg.norm(vec)
+        return vec / norm if norm > 0 else vec
+
+    def _embed_remote(self, texts: List[str]) -> List[List[float]]:
+        return [self.embed_one(t).tolist() for t in texts]
+
+
+class SentenceTransformerEmbeddingFunction(BaseEmbeddingFunction):
+    backend = "st"
+
+    def __init__(self, model: str = "all-MiniLM-L6-v2", cache: Optional[EmbeddingCache] = None, use_cache: bool = True):
+        try:
+            from sentence_transformers import SentenceTransformer
+        except ImportError as e:
+            raise RuntimeError(
+                "EMBEDDING_BACKEND=sentence-transformers requires `pip install sentence-transformers`."
+            ) from e
+        self.model = model
+        self.encoder = SentenceTransformer(model, device="cpu")
+        self._init_cache(cache, use_cache)
+
+    def _embed_remote(self, texts: List[str]) -> List[List[float]]:
+        return self.encoder.encode(texts, normalize_embeddings=True, convert_to_numpy=True).tolist()
+
+
+EMBEDDING_BACKENDS = {
+    "openai": OpenAIEmbeddingFunction,
+    "hashing": HashingEmbeddingFunction,
+    "sentence-transformers": SentenceTransformerEmbeddingFunction,
+}
+
+
+def get_embedding_function(
+    backend: Optional[str] = None,
+    client=None,
+    client_factory: Optional[Callable[[], Any]] = None,
+) -> BaseEmbeddingFunction:
+    """
+    backend 이름 (None이면 EMBEDDING_BACKEND 환경변수, 기본 openai) -> embedding function.
+    client / client_factory: openai backend가 쓸 OpenAI client, 또는 처음 필요할 때 부를 함수 (없으면 새로 만든다)
+    """
+    backend = (backend or os.getenv("EMBEDDING_BACKEND", "openai")).lower()
+    if backend not in EMBEDDING_BACKENDS:
+        raise ValueError(f"Unknown EMBEDDING_BACKEND {backend!r}; choose from {sorted(EMBEDDING_BACKENDS)}")
+    kwargs = {}
+    if backend == "openai":
+        kwargs.update(client=client, client_factory=client_factory)
+    model = os.getenv("EMBEDDING_MODEL")
+    if model and backend != "hashing":
+        kwargs["model"] = model
+    return EMBEDDING_BACKENDS[backend](**kwargs)
+
+
+def embed_in_batches(
+    emb: BaseEmbeddingFunction,
+    texts: List[str],
+    concurrency: Optional[int] = None,
+) -> Iterator[Tuple[List[int], List[List[float]]]]:
+    """
+    Embed texts in token-budgeted batches with concurrent requests.
+    Yields (indices, embeddings) per batch as soon as it finishes.
+    """
+    batches = batch_by_token_budget(texts)
+    with ThreadPoolExecutor(max_workers=concurrency or emb.concurrency) as pool:
+        futures = {
+            pool.submit(emb.embed, [texts[i] for i in idxs]): idxs for idxs in batches
+        }
+        for fut in as_completed(futures):
+            yield futures[fut], fut.result()
@@ -0,0 +1,304 @@
+"""
+In-process vector index for the ADA guideline corpus (no Chroma / SQLite round-trip).
+
+chunk들을 (domain, population) 파티션별로 정렬해서 L2-normalized float32 행렬 하나에 저장한다.
+파티션은 그 행렬의 연속 구간(slice)이라 filtered top-k는 파티션 행렬 x query 벡터 한 번으로 끝난다.
+파티션마다 BM25 inverted index도 따로 만들어서 dense score와 섞는다 (hybrid, HYBRID_ALPHA).
+디스크에는 .vector_index/<collection>/vectors-<fingerprint>.npy (mmap으로 로드) + meta.json 으로 저장한다.
+fingerprint는 corpus + embedding 공간 (collection / 모델 / dim): 모델을 바꾸면 저장된 index를 다시 쓰지 않는다.
+"""
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from rag.bm25 import BM25Index
+from rag.corpus import load_chunks
+from rag.embeddings import BaseEmbeddingFunction, embed_in_batches
+
+INDEX_DIR = os.getenv("VECTOR_INDEX_DIR", ".vector_index")
+INDEX_VERSION = 1
+# fused score = alpha * dense + (1 - alpha) * BM25 (둘 다 파티션 안에서 0~1로 정규화), 1.0이면 dense only
+HYBRID_ALPHA = float(os.getenv("HYBRID_ALPHA", "0.5"))
+
+Partition = Tuple[Optional[str], Optional[str]]
+
+
+def corpus_fingerprint(ids: Sequence[str], docs: Sequence[str], metas: Sequence[Dict[str, str]]) -> str:
+    h = hashlib.sha256()
+    for i, d, m in zip(ids, docs, metas):
+        h.update(i.encode("utf-8"))
+        h.update(b"\0")
+        h.update(d.encode("utf-8"))
+        h.update(b"\0")
+        h.update(json.dumps(m, sort_keys=True).encode("utf-8"))
+        h.update(b"\0")
+    return h.hexdigest()
+
+
+def embedding_signature(emb: BaseEmbeddingFunction) -> Dict[str, Any]:
+    """index vector가 어떤 embedding 공간인지 (collection / 모델 / dim, dim은 고정된 backend만)"""
+    return {"collection": emb.collection_name, "model": emb.cache_model, "dim": getattr(emb, "dim", None)}
+
+
+def index_fingerprint(
+    emb: BaseEmbeddingFunction,
+    ids: Sequence[str],
+    docs: Sequence[str],
+    metas: Sequence[Dict[str, str]],
+) -> str:
+    """corpus + embedding 공간: 둘 중 하나라도 바뀌면 저장된 index를 다시 쓰지 않는다"""
+    h = hashlib.sha256(json.dumps(embedding_signature(emb), sort_keys=True).encode("utf-8"))
+    h.update(corpus_fingerprint(ids, docs, metas).encode("utf-8"))
+    return h.hexdigest()
+
+
+def _normalize(mat: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(mat, axis=-1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return (mat / norms).astype(np.float32)
+
+
+class InMemoryIndex:
+    def __init__(
+        self,
+        ids: List[str],
+        docs: List[str],
+        metas: List[Dict[str, str]],
+        vectors: np.ndarray,
+        fingerprint: str = "",
+        embedding: Optional[Dict[str, Any]] = None,
+    ):
+        """vectors는 이미 파티션 순서로 정렬 + normalize 된 [N, dim] 행렬 (mmap 가능)"""
+        self.ids = ids
+        self.docs = docs
+        self.metas = metas
+        self.vectors = vectors
+        self.fingerprint = fingerprint
+        self.embedding = embedding   # embedding_signature (build할 때의 embedding 공간)
+
+        self.partitions: Dict[Partition, slice] = {}
+        start = 0
+        for i in range(1, len(ids) + 1):
+            if i == len(ids) or self._key(metas[i]) != self._key(metas[start]):
+                self.partitions[self._key(metas[start])] = slice(start, i)
+                start = i
+
+        # 파티션별 BM25 (filter된 query는 다른 domain의 posting을 보지 않는다)
+        self.lexical: Dict[Partition, BM25Index] = {
+            key: BM25Index(docs[sl]) for key, sl in self.partitions.items()
+        }
+
+    @staticmethod
+    def _key(meta: Dict[str, str]) -> Partition:
+        return meta.get("domain"), meta.get("population")
+
+    # ----------------- build / persist -----------------
+    @classmethod
+    def build(
+        cls,
+        emb: BaseEmbeddingFunction,
+        ids: Optional[List[str]] = None,
+        docs: Optional[List[str]] = None,
+        metas: Optional[List[Dict[str, str]]] = None,
+        previous: Optional["InMemoryIndex"] = None,
+    ) -> "InMemoryIndex":
+        """
+        previous index가 있으면 id + 내용이 같은 chunk는 vector를 재사용하고 나머지만 embedding
+        (previous가 같은 embedding 공간일 때만)
+        """
+        if ids is None:
+            ids, docs, metas = load_chunks()
+
+        signature = embedding_signature(emb)
+        vectors: List[Optional[Any]] = [None] * len(docs)
+        if previous is not None and previous.embedding == signature:
+            old_rows = {cid: row for row, cid in enumerate(previous.ids)}
+            for i, (cid, doc) in enumerate(zip(ids, docs)):
+                row = old_rows.get(cid)
+                if row is not None and previous.docs[row] == doc:
+                    vectors[i] = previous.vectors[row]
+
+        todo = [i for i, v in enumerate(vectors) if v is None]
+        for idxs, embeddings in embed_in_batches(emb, [docs[i] for i in todo]):
+            for i, v in zip(idxs, embeddings):
+                vectors[todo[i]] = v
+
+        order = sorted(range(len(ids)), key=lambda i: (str(metas[i].get("domain")), str(metas[i].get("population")), i))
+        mat = _normalize(np.asarray([vectors[i] for i in order], dtype=np.float32))
+        return cls(
+            [ids[i] for i in order],
+            [docs[i] for i in order],
+            [metas[i] for i in order],
+            mat,
+            index_fingerprint(emb, ids, docs, metas),
+            signature,
+        )
+
+    def save(self, path: str):
+        """
+        tmp 디렉터리에 다 쓴 뒤 os.replace: vectors 파일 (fingerprint별 이름) 먼저, meta.json이 마지막.
+        동시에 load하는 process는 항상 같은 build의 meta + vectors 쌍을 본다.
+        """
+        os.makedirs(path, exist_ok=True)
+        tmp = tempfile.mkdtemp(prefix=".tmp-", dir=path)
+        vectors_name = f"vectors-{self.fingerprint[:16]}.npy"
+        try:
+            np.save(os.path.join(tmp, vectors_name), np.ascontiguousarray(self.vectors))
+            with open(os.path.join(tmp, "meta.json"), "w", encoding="utf-8") as f:
+                json.dump(
+                    {
+                        "version": INDEX_VERSION,
+                        "fingerprint": self.fingerprint,
+                        "embedding": self.embedding,
+                        "vectors": vectors_name,
+                        "ids": self.ids,
+                        "docs": self.docs,
+                        "metas": self.metas,
+                    },
+                    f,
+                )
+            os.replace(os.path.join(tmp, vectors_name), os.path.join(path, vectors_name))
+            os.replace(os.path.join(tmp, "meta.json"), os.path.join(path, "meta.json"))
+        finally:
+            shutil.rmtree(tmp, ignore_errors=True)
+
+        # 이전 build의 vectors 파일 (이미 mmap한 process는 그대로 읽을 수 있다)
+        for fname in os.listdir(path):
+            if fname.startswith("vectors") and fname.endswith(".npy") and fname != vectors_name:
+                try:
+                    os.remove(os.path.join(path, fname))
+                except OSError:   # Windows: 다른 곳에서 아직 열려 있음, 다음 save 때 지운다
+                    pass
+
+    @classmethod
+    def load(cls, path: str, mmap: bool = True) -> "InMemoryIndex":
+        for attempt in range(2):
+            with open(os.path.join(path, "meta.json"), "r", encoding="utf-8") as f:
+                meta = json.load(f)
+            if meta.get("version") != INDEX_VERSION:
+                raise ValueError(f"Unsupported vector index version in {path}")
+            try:
+                vectors = np.load(os.path.join(path, meta.get("vectors", "vectors.npy")),
+                                  mmap_mode="r" if mmap else None)
+                break
+            except FileNotFoundError:
+                # meta.json을 읽은 사이에 다른 process가 새 build를 save함 -> 새 meta.json으로 한 번 더
+                if attempt == 1:
+                    raise
+        return cls(meta["ids"], meta["docs"], meta["metas"], vectors, meta["fingerprint"], meta.get("embedding"))
+
+    # ----------------- search -----------------
+    def _rows(self, domain: Optional[str], population: Optional[str]) -> List[Partition]:
+        return [
+            key for key in self.partitions
+            if (not domain or key[0] == domain) and (not population or key[1] == population)
+        ]
+
+    @staticmethod
+    def _rescale(scores: np.ndarray) -> np.ndarray:
+        """query별 (row 방향) min-max -> 0~1"""
+        lo = scores.min(axis=1, keepdims=True)
+        span = scores.max(axis=1, keepdims=True) - lo
+        span[span == 0] = 1.0
+        return (scores - lo) / span
+
+    def search(
+        self,
+        query_vecs: Any,
+        domain: Optional[str] = None,
+        population: Optional[str] = None,
+        k: int = 4,
+        query_texts: Optional[Sequence[str]] = None,
+        alpha: float = 1.0,
+    ) -> List[List[Tuple[int, float]]]:
+        """
+        query_vecs [Q, dim] -> 쿼리별 [(row, score)] top-k.
+        dense는 파티션 행렬 x query 행렬 곱 한 번. query_texts + alpha < 1이면 BM25 score와 섞는다.
+        """
+        q = _normalize(np.atleast_2d(np.asarray(query_vecs, dtype=np.float32)))
+        keys = self._rows(domain, population)
+        if not keys or k <= 0:
+            return [[] for _ in range(len(q))]
+
+        slices = [self.partitions[key] for key in keys]
+        rows = np.concatenate([np.arange(sl.start, sl.stop) for sl in slices])
+        mat = self.vectors[slices[0]] if len(slices) == 1 else self.vectors[rows]
+        scores = q @ mat.T   # [Q, rows]
+
+        if query_texts is not None and alpha < 1.0:
+            lexical = np.stack([
+                np.concatenate([self.lexical[key].scores(text) for key in keys])
+                for text in query_texts
+            ])
+            scores = alpha * self._rescale(scores) + (1.0 - alpha) * self._rescale(lexical)
+
+        k = min(k, scores.shape[1])   # 후보 수보다 큰 k는 후보 전체
+        top = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+        results = []
+        for qi in range(len(q)):
+            cand = top[qi][np.argsort(-scores[qi, top[qi]])]
+            results.append([(int(rows[c]), float(scores[qi, c])) for c in cand])
+        return results
+
+    def query_chunks_batch(
+        self,
+        requests: List[Dict[str, str]],
+        emb: BaseEmbeddingFunction,
+        n_results: int = 4,
+        alpha: float = HYBRID_ALPHA,
+    ) -> List[List[Tuple[str, str]]]:
+        """retrieve_guideline_chunks_batch와 같은 입력 / 출력 (요청별 (chunk id, text)), 기본은 hybrid"""
+        queries = list(dict.fromkeys(r["query"] for r in requests))
+        query_vecs = dict(zip(queries, emb.embed(queries)))
+
+        by_filter: Dict[Partition, List[str]] = {}
+        for r in requests:
+            qs = by_filter.setdefault((r["domain"], r["population"]), [])
+            if r["query"] not in qs:
+                qs.append(r["query"])
+
+        results: Dict[tuple, List[Tuple[str, str]]] = {}
+        for (domain, population), qs in by_filter.items():
+            hits = self.search([query_vecs[q] for q in qs], domain, population, n_results, qs, alpha)
+            for q, h in zip(qs, hits):
+                results[(domain, population, q)] = [(self.ids[row], self.docs[row]) for row, _ in h]
+        return [results[(r["domain"], r["population"], r["query"])] for r in requests]
+
+    def query_batch(
+        self,
+        requests: List[Dict[str, str]],
+        emb: BaseEmbeddingFunction,
+        n_results: int = 4,
+        alpha: float = HYBRID_ALPHA,
+    ) -> List[str]:
+        """retrieve_guidelines_batch와 같은 입력 / 출력 (요청별 evidence text)"""
+        hits = self.query_chunks_batch(requests, emb, n_results, alpha)
+        return ["\n\n".join(doc for _, doc in h) for h in hits]
+
+
+def get_or_build_index(emb: BaseEmbeddingFunction, index_dir: str = INDEX_DIR) -> InMemoryIndex:
+    """persisted index를 mmap으로 로드, corpus나 embedding 모델이 바뀌었으면 다시 build + save"""
+    path = os.path.join(index_dir, emb.collection_name)
+    ids, docs, metas = load_chunks(verbose=False)
+    fingerprint = index_fingerprint(emb, ids, docs, metas)
+
+    previous = None
+    if os.path.exists(os.path.join(path, "meta.json")):
+        try:
+            previous = InMemoryIndex.load(path)
+            if previous.fingerprint == fingerprint:
+                return previous
+            previous.vectors = np.array(previous.vectors)   # 이전 vectors 파일은 save에서 지운다
+            print(f"Guideline corpus or embedding model changed; updating in-memory index '{emb.collection_name}'.")
+        except (ValueError, OSError, KeyError) as e:
+            print(f"Could not load in-memory index ({e}); rebuilding.")
+
+    index = InMemoryIndex.build(emb, ids, docs, metas, previous=previous)
+    index.save(path)
+    print(f"In-memory index '{emb.collection_name}' built: {len(ids)} chunks, {len(index.partitions)} partitions.")
+    return index
@@ -0,0 +1,57 @@
+"""
+Vectorstore manifest: resource file별 content hash + chunking parameter.
+
+    {"version": 1, "chunk_size": 900, "chunk_overlap": 120,
+     "files": {"ADA_Behaviors.txt": {"sha256": "...", "n_chunks": 681}, ...}}
+
+get_or_build_vectorstore가 이걸 보고 바뀐 / 새 파일만 다시 chunking + embedding하고,
+지워진 파일이나 줄어든 파일의 stale chunk id를 삭제한다.
+"""
+import json
+import os
+from typing import Any, Dict, List, Optional, Tuple
+
+from rag.corpus import RESOURCES_DIR, chunk_params, file_fingerprint, list_resource_files
+
+MANIFEST_VERSION = 1
+
+
+def current_fingerprints(resources_dir: str = RESOURCES_DIR) -> Dict[str, str]:
+    return {fname: file_fingerprint(fname, resources_dir) for fname in list_resource_files(resources_dir)}
+
+
+def load_manifest(path: str) -> Optional[Dict[str, Any]]:
+    if not os.path.exists(path):
+        return None
+    with open(path, "r", encoding="utf-8") as f:
+        manifest = json.load(f)
+    if manifest.get("version") != MANIFEST_VERSION:
+        return None
+    return manifest
+
+
+def save_manifest(path: str, files: Dict[str, Dict[str, Any]]):
+    manifest = {"version": MANIFEST_VERSION, **chunk_params(), "files": files}
+    tmp = path + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=2, sort_keys=True)
+    os.replace(tmp, path)
+
+
+def diff_manifest(
+    manifest: Optional[Dict[str, Any]],
+    fingerprints: Dict[str, str],
+) -> Tuple[List[str], List[str]]:
+    """
+    -> (changed, removed) file names.
+    manifest가 없거나 chunking parameter가 바뀌었으면 모든 파일이 changed.
+    """
+    if manifest is None:
+        return sorted(fingerprints), []
+
+    old_files = manifest.get("files", {})
+    removed = [f for f in sorted(old_files) if f not in fingerprints]
+    if any(manifest.get(k) != v for k, v in chunk_params().items()):
+        return sorted(fingerprints), removed
+    changed = [f for f, sha in sorted(fingerprints.items()) if old_files.get(f, {}).get("sha256") != sha]
+    return changed, removed
@@ -0,0 +1,92 @@
+"""
+Token-budgeted evidence for the recommendation prompt.
+
+- 여러 action에서 같은 chunk가 검색되면 한 번만 넣고 action에서는 "E1", "E2" ... ref로 가리킨다.
+- 나머지 prompt를 뺀 token budget 안에서 action마다 rank 순서대로 돌아가며 chunk를 채운다
+  (모든 action의 1순위 chunk -> 2순위 -> ...), 안 들어가는 chunk는 뺀다.
+- token 수는 tiktoken(로컬 tokenizer)으로 센다. tiktoken이 없거나 encoding을 못 읽으면 ~4 chars/token 추정.
+"""
+import json
+import os
+import threading
+from typing import Any, Dict, List, Optional, Tuple
+
+from rag.embeddings import estimate_tokens
+
+PROMPT_TOKEN_BUDGET = int(os.getenv("PROMPT_TOKEN_BUDGET", "6000"))
+PROMPT_ENCODING = os.getenv("PROMPT_ENCODING", "o200k_base")   # gpt-4.1 / gpt-4o tokenizer
+
+_encoder: Any = None
+_encoder_lock = threading.Lock()
+
+
+def _get_encoder():
+    global _encoder
+    if _encoder is None:
+        with _encoder_lock:
+            if _encoder is None:
+                try:
+                    import tiktoken
+
+                    _encoder = tiktoken.get_encoding(PROMPT_ENCODING)
+                except Exception as e:   # not installed, or encoding file not cached and no network
+                    print(f"tiktoken unavailable ({type(e).__name__}); estimating prompt tokens as ~4 chars/token.")
+                    _encoder = False
+    return _encoder
+
+
+def count_tokens(text: str) -> int:
+    enc = _get_encoder()
+    if enc:
+        return len(enc.encode(text))
+    return estimate_tokens(text)
+
+
+def _block_chunks(block: Dict) -> List[Tuple[str, str]]:
+    # blocks built without chunk ids (only joined "evidence" text) count as one chunk keyed by its text
+    if "chunks" in block:
+        return block["chunks"]
+    text = block.get("evidence") or ""
+    return [(text, text)] if text else []
+
+
+def dedup_evidence(
+    evidence_blocks: List[Dict],
+    budget: Optional[int] = None,
+) -> Tuple[List[Dict[str, str]], List[Dict[str, Any]]]:
+    """
+    evidence_blocks (block["chunks"] = [(chunk id, text)], rank 순) ->
+      chunks:    [{"ref": "E1", "text": ...}]  (중복 없이, 처음 나온 순서)
+      by_action: [{"variable": ..., "refs": ["E1", ...]}]
+    budget: evidence_chunks에 쓸 수 있는 token 수 (None이면 제한 없음, by_action의 ref 몇 token은 따로)
+    """
+    refs: Dict[str, str] = {}
+    texts: Dict[str, str] = {}
+    action_refs: List[List[str]] = [[] for _ in evidence_blocks]
+    used = 0
+
+    depth = max((len(_block_chunks(b)) for b in evidence_blocks), default=0)
+    for rank in range(depth):
+        for i, block in enumerate(evidence_blocks):
+            chunks = _block_chunks(block)
+            if rank >= len(chunks):
+                continue
+            cid, text = chunks[rank]
+            if cid not in refs:
+                ref = f"E{len(refs) + 1}"
+                # charged as it is serialized in the prompt (JSON escaping included)
+                cost = count_tokens(json.dumps({"ref": ref, "text": text}, ensure_ascii=False)) + 2
+                if budget is not None and used + cost > budget:
+                    continue
+                used += cost
+                refs[cid] = ref
+                texts[cid] = text
+            if refs[cid] not in action_refs[i]:
+                action_refs[i].append(refs[cid])
+
+    chunks_out = [{"ref": ref, "text": texts[cid]} for cid, ref in refs.items()]
+    by_action = [
+        {"variable": block["variable"], "refs": action_refs[i]}
+        for i, block in enumerate(evidence_blocks)
+    ]
+    return chunks_out, by_action
@@ -0,0 +1,154 @@
+"""
+Process-wide resources for the recommendation pipeline.
+
+요청마다 OpenAI() / chromadb.PersistentClient / load_dotenv를 새로 만들지 않도록
+프로세스당 한 번만 만들어서 Streamlit session / batch job이 같이 쓴다.
+- OpenAI client 하나 (httpx connection pool + keep-alive, chat + embedding 공용, 처음 쓸 때 생성)
+- AsyncOpenAI client (event loop마다 하나) + sync 호출용 background event loop
+- embedding function 하나 (EMBEDDING_BACKEND)
+- retriever 하나 (RETRIEVAL_BACKEND=memory: InMemoryIndex, chroma: collection handle)
+"""
+import asyncio
+import os
+import threading
+import weakref
+from typing import Any, Coroutine, Dict, List, Optional, Tuple
+
+from dotenv import load_dotenv
+
+from rag.embeddings import BaseEmbeddingFunction, get_embedding_function
+
+OPENAI_MAX_CONNECTIONS = int(os.getenv("OPENAI_MAX_CONNECTIONS", "20"))
+OPENAI_MAX_KEEPALIVE = int(os.getenv("OPENAI_MAX_KEEPALIVE", "10"))
+OPENAI_TIMEOUT = float(os.getenv("OPENAI_TIMEOUT", "60"))
+
+
+class RagResources:
+    def __init__(self, embedding_backend: Optional[str] = None, retrieval_backend: Optional[str] = None):
+        load_dotenv()
+        self._lock = threading.Lock()
+        self._openai = None
+
+        # OpenAI client (+ API key 확인)는 LLM이나 openai embedding backend가 처음 쓸 때 만든다
+        # -> hashing / sentence-transformers backend의 retrieval은 key 없이 오프라인으로 동작
+        self.emb: BaseEmbeddingFunction = get_embedding_function(
+            embedding_backend, client_factory=lambda: self.openai
+        )
+        self.retrieval_backend = (retrieval_backend or os.getenv("RETRIEVAL_BACKEND", "memory")).lower()
+
+        self._chroma = None
+        self._collection = None
+        self._index = None
+
+        # httpx.AsyncClient의 connection은 만든 event loop에 묶여 있어서 loop별로 하나씩
+        self._async_clients: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, Any]" = weakref.WeakKeyDictionary()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+
+    @staticmethod
+    def _require_key():
+        if not os.getenv("OPENAI_API_KEY"):
+            raise RuntimeError("OPENAI_API_KEY not found. Put it in a .env file.")
+
+    @property
+    def openai(self):
+        """sync OpenAI client (chat + openai embedding backend 공용, 처음 쓸 때 한 번)"""
+        if self._openai is None:
+            self._require_key()
+            with self._lock:
+                if self._openai is None:
+                    from openai import DefaultHttpxClient, OpenAI
+
+                    self._openai = OpenAI(
+                        http_client=DefaultHttpxClient(limits=self._limits(), timeout=OPENAI_TIMEOUT)
+                    )
+        return self._openai
+
+    @staticmethod
+    def _limits():
+        import httpx
+
+        return httpx.Limits(max_connections=OPENAI_MAX_CONNECTIONS, max_keepalive_connections=OPENAI_MAX_KEEPALIVE)
+
+    # ----------------- async -----------------
+    @property
+    def async_openai(self):
+        """현재 실행 중인 event loop용 AsyncOpenAI client (async 함수 안에서만 호출)"""
+        loop = asyncio.get_running_loop()
+        client = self._async_clients.get(loop)
+        if client is None:
+            self._require_key()
+            from openai import AsyncOpenAI, DefaultAsyncHttpxClient
+
+            client = AsyncOpenAI(http_client=DefaultAsyncHttpxClient(limits=self._limits(), timeout=OPENAI_TIMEOUT))
+            self._async_clients[loop] = client
+        return client
+
+    def run(self, coro: Coroutine):
+        """
+        sync 코드에서 coroutine 실행. 매번 asyncio.run으로 새 loop를 만들면 async connection pool을 못 쓰니까
+        프로세스당 background loop 하나에서 돌린다 (Streamlit처럼 이미 loop가 있는 thread에서도 동작).
+        """
+        if self._loop is None:
+            with self._lock:
+                if self._loop is None:
+                    loop = asyncio.new_event_loop()
+                    threading.Thread(target=loop.run_forever, name="rag-event-loop", daemon=True).start()
+                    self._loop = loop
+        return asyncio.run_coroutine_threadsafe(coro, self._loop).result()
+
+    # ----------------- retriever (처음 쓸 때 한 번) -----------------
+    @property
+    def collection(self):
+        """Chroma collection handle (PersistentClient는 프로세스당 하나)"""
+        if self._collection is None:
+            with self._lock:
+                if self._collection is None:
+                    import chromadb
+
+                    from rag.vectorstore import CHROMA_DB_PATH, get_or_build_vectorstore
+
+                    os.makedirs(CHROMA_DB_PATH, exist_ok=True)
+                    self._chroma = chromadb.PersistentClient(path=CHROMA_DB_PATH)
+                    self._collection = get_or_build_vectorstore(self.emb, client=self._chroma)
+        return self._collection
+
+    @property
+    def index(self):
+        """InMemoryIndex (vectors-<fingerprint>.npy mmap)"""
+        if self._index is None:
+            with self._lock:
+                if self._index is None:
+                    from rag.index import get_or_build_index
+
+                    self._index = get_or_build_index(self.emb)
+        return self._index
+
+    def retrieve_chunks(self, requests: List[Dict[str, str]], n_results: int = 4) -> List[List[Tuple[str, str]]]:
+        """[{"domain", "population", "query"}] -> 요청별 [(chunk id, text)]"""
+        if self.retrieval_backend == "chroma":
+            from rag.vectorstore import retrieve_guideline_chunks_batch
+
+            return retrieve_guideline_chunks_batch(self.collection, requests, emb=self.emb, n_results=n_results)
+        return self.index.query_chunks_batch(requests, self.emb, n_results=n_results)
+
+    def retrieve(self, requests: List[Dict[str, str]], n_results: int = 4) -> List[str]:
+        """[{"domain", "population", "query"}] -> 요청별 evidence text"""
+        return ["\n\n".join(doc for _, doc in hits) for hits in self.retrieve_chunks(requests, n_results)]
+
+    def close(self):
+        if self._openai is not None:
+            self._openai.close()
+
+
+_resources: Optional[RagResources] = None
+_resources_lock = threading.Lock()
+
+
+def get_rag_resources() -> RagResources:
+    """프로세스 전역 RagResources (EMBEDDING_BACKEND / RETRIEVAL_BACKEND는 처음 만들 때 읽는다)"""
+    global _resources
+    if _resources is None:
+        with _resources_lock:
+            if _resources is None:
+                _resources = RagResources()
+    return _resources
@@ -0,0 +1,126 @@
+"""
+Local cache of LLM recommendation texts for identical requests.
+
+key = sha256(canonical JSON of clinical vars, context, rl_actions, evidence chunk ids, model settings,
+prompt version). 같은 환자 입력으로 다시 생성하거나 demo / test를 반복 실행할 때 LLM을 다시 부르지 않는다.
+SQLite 하나에 저장, TTL이 지나면 miss, max_entries를 넘으면 가장 오래 안 쓴 항목(LRU)부터 지운다.
+"""
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, Optional
+
+DEFAULT_CACHE_DIR = os.getenv("RESPONSE_CACHE_DIR", ".response_cache")
+DEFAULT_TTL = float(os.getenv("RESPONSE_CACHE_TTL", str(7 * 24 * 3600)))   # seconds
+DEFAULT_MAX_ENTRIES = int(os.getenv("RESPONSE_CACHE_MAX_ENTRIES", "2000"))
+
+
+def _canonical(obj: Any) -> Any:
+    """dict key 순서 / tuple vs list / 56 vs 56.0 차이가 key를 바꾸지 않게"""
+    if isinstance(obj, dict):
+        return {str(k): _canonical(v) for k, v in obj.items()}
+    if isinstance(obj, (list, tuple)):
+        return [_canonical(v) for v in obj]
+    if isinstance(obj, bool) or obj is None or isinstance(obj, str):
+        return obj
+    if isinstance(obj, (int, float)):
+        return float(obj)
+    return str(obj)
+
+
+def request_key(**parts: Any) -> str:
+    payload = json.dumps(_canonical(parts), sort_keys=True, separators=(",", ":"), ensure_ascii=False)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class ResponseCache:
+    def __init__(
+        self,
+        path: str = DEFAULT_CACHE_DIR,
+        ttl: float = DEFAULT_TTL,
+        max_entries: int = DEFAULT_MAX_ENTRIES,
+    ):
+        self.path = path
+        self.ttl = ttl
+        self.max_entries = max_entries
+        os.makedirs(path, exist_ok=True)
+
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(os.path.join(path, "responses.sqlite"), check_same_thread=False)
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS responses ("
+            " key TEXT PRIMARY KEY, text TEXT NOT NULL,"
+            " created REAL NOT NULL, last_used REAL NOT NULL)"
+        )
+        self._db.execute("CREATE INDEX IF NOT EXISTS responses_lru ON responses (last_used)")
+        self._db.commit()
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key: str) -> Optional[str]:
+        now = time.time()
+        with self._lock:
+            row = self._db.execute("SELECT text, created FROM responses WHERE key = ?", (key,)).fetchone()
+            if row is None or now - row[1] > self.ttl:
+                if row is not None:
+                    self._db.execute("DELETE FROM responses WHERE key = ?", (key,))
+                    self._db.commit()
+                self.misses += 1
+                return None
+            self._db.execute("UPDATE responses SET last_used = ? WHERE key = ?", (now, key))
+            self._db.commit()
+            self.hits += 1
+            return row[0]
+
+    def put(self, key: str, text: str):
+        now = time.time()
+        with self._lock:
+            self._db.execute(
+                "INSERT OR REPLACE INTO responses (key, text, created, last_used) VALUES (?, ?, ?, ?)",
+                (key, text, now, now),
+            )
+            # 만료된 항목 정리 후에도 넘치면 LRU부터
+            self._db.execute("DELETE FROM responses WHERE created < ?", (now - self.ttl,))
+            count = self._db.execute("SELECT COUNT(*) FROM responses").fetchone()[0]
+            if count > self.max_entries:
+                n = count - self.max_entries
+                self._db.execute(
+                    "DELETE FROM responses WHERE key IN (SELECT key FROM responses ORDER BY last_used LIMIT ?)", (n,)
+                )
+                self.evictions += n
+            self._db.commit()
+
+    def stats(self) -> Dict[str, float]:
+        with self._lock:
+            entries = self._db.execute("SELECT COUNT(*) FROM responses").fetchone()[0]
+            total = self.hits + self.misses
+            return {
+                "entries": entries,
+                "max_entries": self.max_entries,
+                "ttl": self.ttl,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": self.hits / total if total else 0.0,
+            }
+
+
+_cache: Optional[ResponseCache] = None
+_cache_lock = threading.Lock()
+
+
+def get_response_cache() -> Optional[ResponseCache]:
+    """프로세스 전역 ResponseCache (RESPONSE_CACHE=0 이면 None -> 캐시 안 씀)"""
+    global _cache
+    if os.getenv("RESPONSE_CACHE", "1") == "0":
+        return None
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                _cache = ResponseCache()
+    return _cache
@@ -0,0 +1,183 @@
+"""
+Chroma vectorstore for the ADA guideline corpus (RETRIEVAL_BACKEND=chroma) + batched filtered queries.
+"""
+import os
+from typing import Any, Dict, List, Optional, Tuple
+
+import chromadb
+from chromadb.api.types import EmbeddingFunction
+
+from rag.embeddings import BaseEmbeddingFunction, embed_in_batches, get_embedding_function
+from rag.corpus import load_file_chunks
+from rag.manifest import current_fingerprints, diff_manifest, load_manifest, save_manifest
+
+CHROMA_DB_PATH = "chroma_db"
+
+
+class ChromaEmbeddingFunction(EmbeddingFunction):
+    """BaseEmbeddingFunction -> chromadb EmbeddingFunction (cache / batching은 그대로 emb가 한다)"""
+
+    def __init__(self, emb: BaseEmbeddingFunction):
+        self.emb = emb
+
+    def __call__(self, input):
+        return self.emb(input)
+
+
+def get_or_build_vectorstore(emb: Optional[BaseEmbeddingFunction] = None, client=None):
+    """client: 이미 열어둔 chromadb client (없으면 CHROMA_DB_PATH에 PersistentClient를 새로 연다)"""
+    db_path = CHROMA_DB_PATH
+    os.makedirs(db_path, exist_ok=True)
+    if client is None:
+        client = chromadb.PersistentClient(path=db_path)
+    emb = emb or get_embedding_function()
+    name = emb.collection_name  # one collection per embedding backend
+    manifest_path = os.path.join(db_path, f"{name}.manifest.json")
+
+    try:
+        col = client.get_collection(name, embedding_function=ChromaEmbeddingFunction(emb))
+        manifest = load_manifest(manifest_path)
+        existed = True
+    except Exception:
+        print(f"No existing '{name}' collection. Building vectorstore from scratch...")
+        col = client.create_collection(name=name, embedding_function=ChromaEmbeddingFunction(emb))
+        manifest = None
+        existed = False
+
+    # per-file content hash -> only changed / new files are re-chunked and re-embedded
+    fingerprints = current_fingerprints()
+    changed, removed = diff_manifest(manifest, fingerprints)
+    if not changed and not removed:
+        print(f"Found existing '{name}' collection. Reusing vectorstore.")
+        return col
+    if existed:
+        print(f"Updating '{name}' collection: {len(changed)} changed, {len(removed)} removed resource files.")
+
+    old_files = (manifest or {}).get("files", {})
+    files = {f: entry for f, entry in old_files.items() if f in fingerprints}
+
+    ids: List[str] = []
+    docs: List[str] = []
+    metas: List[Dict[str, str]] = []
+    stale: List[str] = []
+    retag_ids: List[str] = []
+    retag_metas: List[Dict[str, str]] = []
+    for fname in changed:
+        file_ids, chunks, file_metas = load_file_chunks(fname)
+        # chunk whose text is already stored is not embedded again (only its metadata is updated)
+        stored = col.get(ids=file_ids, include=["documents", "metadatas"]) if existed else {"ids": []}
+        stored_docs = dict(zip(stored["ids"], stored.get("documents") or []))
+        stored_metas = dict(zip(stored["ids"], stored.get("metadatas") or []))
+        for cid, ch, meta in zip(file_ids, chunks, file_metas):
+            if stored_docs.get(cid) != ch:
+                ids.append(cid)
+                docs.append(ch)
+                metas.append(meta)
+            elif stored_metas.get(cid) != meta:
+                retag_ids.append(cid)
+                retag_metas.append(meta)
+        old_n = old_files.get(fname, {}).get("n_chunks", 0)
+        stale += [f"{fname}_{i}" for i in range(len(chunks), old_n)]
+        files[fname] = {"sha256": fingerprints[fname], "n_chunks": len(chunks)}
+        print(f"Loaded {fname}: {len(chunks)} chunks")
+    for fname in removed:
+        stale += [f"{fname}_{i}" for i in range(old_files[fname].get("n_chunks", 0))]
+
+    if existed and manifest is None:
+        # collection built before manifests existed: drop anything we would not produce now
+        keep = {f"{f}_{i}" for f, entry in files.items() for i in range(entry["n_chunks"])}
+        stale = [i for i in col.get(include=[])["ids"] if i not in keep]
+
+    # one embeddings request + one bulk upsert per batch (instead of one per chunk)
+    n_batches = 0
+    for idxs, embeddings in embed_in_batches(emb, docs):
+        col.upsert(
+            ids=[ids[i] for i in idxs],
+            documents=[docs[i] for i in idxs],
+            metadatas=[metas[i] for i in idxs],
+            embeddings=embeddings,
+        )
+        n_batches += 1
+    if retag_ids:
+        col.update(ids=retag_ids, metadatas=retag_metas)
+    if stale:
+        col.delete(ids=stale)
+
+    save_manifest(manifest_path, files)
+    print(
+        f"Vectorstore sync complete: {len(docs)} chunks in {n_batches} embedding batches, "
+        f"{len(retag_ids)} retagged, {len(stale)} stale chunks deleted."
+    )
+    return col
+
+
+def build_where(domain: str, population: str) -> Optional[Dict[str, Any]]:
+    conds = []
+    if domain:
+        conds.append({"domain": {"$eq": domain}})
+    if population:
+        conds.append({"population": {"$eq": population}})
+    return {"$and": conds} if conds else None
+
+
+Chunk = Tuple[str, str]   # (chunk id, text)
+
+
+def retrieve_guideline_chunks_batch(
+    collection,
+    requests: List[Dict[str, str]],
+    emb: Optional[BaseEmbeddingFunction] = None,
+    n_results: int = 4,
+) -> List[List[Chunk]]:
+    """
+    Retrieve evidence for many {"domain", "population", "query"} requests at once.
+    - identical (domain, population, query) triples are looked up once
+    - all unique query strings are embedded in a single request (when `emb` is given)
+    - one collection.query per distinct where-filter, with many queries each
+    Returns the (chunk id, text) hits for each request, in order.
+    """
+    triples = list(dict.fromkeys((r["domain"], r["population"], r["query"]) for r in requests))
+
+    query_vecs: Dict[str, Any] = {}
+    if emb is not None:
+        queries = list(dict.fromkeys(q for _, _, q in triples))
+        query_vecs = dict(zip(queries, emb.embed(queries)))
+
+    by_filter: Dict[tuple, List[str]] = {}
+    for domain, population, query in triples:
+        by_filter.setdefault((domain, population), []).append(query)
+
+    results: Dict[tuple, List[Chunk]] = {}
+    for (domain, population), queries in by_filter.items():
+        kwargs: Dict[str, Any] = {"n_results": n_results}
+        where = build_where(domain, population)
+        if where:
+            kwargs["where"] = where
+        if query_vecs:
+            kwargs["query_embeddings"] = [query_vecs[q] for q in queries]
+        else:
+            kwargs["query_texts"] = queries
+        res = collection.query(**kwargs)
+
+        docs_per_query = res.get("documents") or [[] for _ in queries]
+        for query, ids, docs in zip(queries, res["ids"], docs_per_query):
+            results[(domain, population, query)] = list(zip(ids, docs or []))
+
+    return [results[(r["domain"], r["population"], r["query"])] for r in requests]
+
+
+def retrieve_guidelines_batch(
+    collection,
+    requests: List[Dict[str, str]],
+    emb: Optional[BaseEmbeddingFunction] = None,
+    n_results: int = 4,
+) -> List[str]:
+    """retrieve_guideline_chunks_batch, joined evidence text per request"""
+    hits = retrieve_guideline_chunks_batch(collection, requests, emb=emb, n_results=n_results)
+    return ["\n\n".join(doc for _, doc in h) for h in hits]
+
+
+def retrieve_guidelines(collection, domain: str, population: str, query: str) -> str:
+    return retrieve_guidelines_batch(
+        collection, [{"domain": domain, "population": population, "query": query}]
+    )[0]
@@ -0,0 +1,207 @@
+# service.py
+"""
+HTTP inference service (ASGI): scoring, RL planning and LLM recommendation without the Streamlit UI.
+
+    pip install fastapi uvicorn
+    uvicorn service:app --host 0.0.0.0 --port 8000
+
+    POST /score      {"patients": [{34 features}, ...]}                 -> TotalModel DBS risk score (0~100)
+    POST /plan       {"patients": [...], "max_steps": 8}                -> HybridActor 8-week rollout
+    POST /recommend  {"patients": [{34 features, "context": ...}, ...]} -> plan + get_llm_recommendation text
+    GET  /health
+
+- request body는 FEATURE_NAMES에서 만든 pydantic schema로 검증 (빠진 변수 / 숫자가 아닌 값 / NaN -> 422)
+- 한 request의 patients는 한 번에 처리: [B,34] scoring 한 번, VectorPatientEnv로 B명 rollout 한 번
+- /score는 dbs.microbatch로 동시에 들어온 request들까지 모아서 forward 한 번 (SCORE_MAX_BATCH / SCORE_MAX_WAIT_MS)
+- torch 연산은 worker thread pool(SERVICE_WORKERS)에서 돌고, event loop는 다른 request를 계속 받는다
+- /recommend의 retrieval + LLM은 main.get_llm_recommendations_async (LLM_CONCURRENCY 만큼 동시에)
+"""
+import asyncio
+import os
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import asynccontextmanager
+from typing import Any, Callable, Dict, List
+
+import numpy as np
+import pandas as pd
+from fastapi import FastAPI, HTTPException, Request
+from fastapi.encoders import jsonable_encoder
+from fastapi.exceptions import RequestValidationError
+from fastapi.responses import JSONResponse
+from pydantic import BaseModel, ConfigDict, Field, create_model
+
+import dbs
+from dbs.features import FEATURE_NAMES
+
+SERVICE_WORKERS = int(os.getenv("SERVICE_WORKERS", "4"))          # torch inference threads
+SERVICE_MAX_BATCH = int(os.getenv("SERVICE_MAX_BATCH", "1024"))    # patients per /score, /plan request
+SERVICE_MAX_RECOMMEND = int(os.getenv("SERVICE_MAX_RECOMMEND", "32"))  # patients per /recommend request (LLM call each)
+
+
+# ----------------- schemas -----------------
+class _Features(BaseModel):
+    model_config = ConfigDict(allow_inf_nan=False)
+
+
+# 34개 모델 변수 (FEATURE_NAMES 순서), 모두 필수
+PatientFeatures = create_model(
+    "PatientFeatures",
+    __base__=_Features,
+    **{name: (float, ...) for name in FEATURE_NAMES},
+)
+
+RecommendPatient = create_model(
+    "RecommendPatient",
+    __base__=PatientFeatures,
+    context=(str, Field("", description="free-text patient context passed to the LLM")),
+)
+
+
+class ScoreRequest(BaseModel):
+    patients: List[PatientFeatures] = Field(..., min_length=1, max_length=SERVICE_MAX_BATCH)
+
+
+class ScoreResponse(BaseModel):
+    scores: List[float]
+
+
+class PlanRequest(BaseModel):
+    patients: List[PatientFeatures] = Field(..., min_length=1, max_length=SERVICE_MAX_BATCH)
+    max_steps: int = Field(8, ge=1, le=52)
+
+
+class PlanStep(BaseModel):
+    week: int
+    variable: str
+    delta: float
+
+
+class Plan(BaseModel):
+    weeks: List[PlanStep]
+    old_score: float
+    new_score: float
+
+
+class PlanResponse(BaseModel):
+    plans: List[Plan]
+
+
+class RecommendRequest(BaseModel):
+    patients: List[RecommendPatient] = Field(..., min_length=1, max_length=SERVICE_MAX_RECOMMEND)
+
+
+class Recommendation(BaseModel):
+    plan: Plan
+    recommendation: str
+
+
+class RecommendResponse(BaseModel):
+    recommendations: List[Recommendation]
+
+
+# ----------------- inference (worker threads) -----------------
+def to_states(patients: List[BaseModel]) -> np.ndarray:
+    """schema 객체들 -> [B,34] float32, FEATURE_NAMES 순서"""
+    return np.array([[getattr(p, name) for name in FEATURE_NAMES] for p in patients], dtype=np.float32)
+
+
+def plan_batch(states: np.ndarray, max_steps: int = 8) -> List[Dict[str, Any]]:
+    """[B,34] -> test_patient와 같은 형태의 환자별 dict (1week..Nweek, old_score, new_score)"""
+    from dbs.batch import plan_chunk, plan_records
+
+    # env는 request마다 새로 (state를 들고 있음), actor / scorer / bounds는 프로세스 전역
+    env = dbs.VectorPatientEnv(dbs.get_col_minmax(), scorer=dbs.get_scorer(), max_steps=max_steps)
+    plans = plan_chunk(pd.DataFrame(states, columns=FEATURE_NAMES), env, dbs.get_actor(), max_steps=max_steps)
+    return list(plan_records(list(range(len(states))), plans))
+
+
+def to_plan(record: Dict[str, Any]) -> Plan:
+    weeks = []
+    step = 1
+    while f"{step}week" in record:
+        variable, delta = record[f"{step}week"]
+        weeks.append(PlanStep(week=step, variable=variable, delta=delta))
+        step += 1
+    return Plan(weeks=weeks, old_score=record["old_score"], new_score=record["new_score"])
+
+
+def _warm_up():
+    dbs.get_col_minmax()
+    dbs.get_scorer()
+    dbs.get_actor()
+    dbs.get_score_batcher()
+
+
+_pool = ThreadPoolExecutor(max_workers=SERVICE_WORKERS, thread_name_prefix="service-worker")
+
+
+async def run_in_pool(fn: Callable, *args: Any) -> Any:
+    return await asyncio.get_running_loop().run_in_executor(_pool, fn, *args)
+
+
+# ----------------- app -----------------
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # scorer / actor / bounds는 첫 request 전에 로드 (RAG + OpenAI client는 첫 /recommend 때)
+    await run_in_pool(_warm_up)
+    yield
+    _pool.shutdown(wait=False)
+
+
+app = FastAPI(title="DBS inference service", lifespan=lifespan)
+
+
+@app.exception_handler(RequestValidationError)
+async def validation_error(request: Request, exc: RequestValidationError) -> JSONResponse:
+    # 기본 handler는 잘못된 "input" 값을 그대로 돌려주는데, NaN / inf는 JSON으로 못 써서 500이 된다
+    errors = [{k: v for k, v in err.items() if k != "input"} for err in exc.errors()]
+    return JSONResponse(status_code=422, content={"detail": jsonable_encoder(errors)})
+
+
+@app.get("/health")
+async def health() -> Dict[str, Any]:
+    from rag.embedding_cache import get_embedding_cache
+
+    return {
+        "status": "ok",
+        "scorer": dbs.get_scorer().stats(),
+        "batcher": dbs.get_score_batcher().stats(),
+        "embedding_cache": get_embedding_cache().stats(),
+    }
+
+
+@app.post("/score", response_model=ScoreResponse)
+async def score(request: ScoreRequest) -> ScoreResponse:
+    scores = await asyncio.wrap_future(dbs.get_score_batcher().submit(to_states(request.patients)))
+    return ScoreResponse(scores=scores.tolist())
+
+
+@app.post("/plan", response_model=PlanResponse)
+async def plan(request: PlanRequest) -> PlanResponse:
+    records = await run_in_pool(plan_batch, to_states(request.patients), request.max_steps)
+    return PlanResponse(plans=[to_plan(r) for r in records])
+
+
+@app.post("/recommend", response_model=RecommendResponse)
+async def recommend(request: RecommendRequest) -> RecommendResponse:
+    from main import get_llm_recommendations_async
+    from rag.resources import get_rag_resources
+
+    try:
+        # LLM용 OpenAI client (key 확인), retriever는 첫 retrieval 때 index 로드 / 빌드
+        await run_in_pool(lambda: get_rag_resources().openai)
+    except RuntimeError as e:   # OPENAI_API_KEY 없음
+        raise HTTPException(status_code=503, detail=str(e))
+
+    records = await run_in_pool(plan_batch, to_states(request.patients))
+    infos = []
+    for patient, record in zip(request.patients, records):
+        # get_llm_recommendation 입력 = test_patient output + context
+        info = patient.model_dump()
+        info.update({k: v for k, v in record.items() if k != "id"})
+        infos.append(info)
+
+    texts = await get_llm_recommendations_async(infos)
+    return RecommendResponse(
+        recommendations=[Recommendation(plan=to_plan(r), recommendation=t) for r, t in zip(records, texts)]
+    )
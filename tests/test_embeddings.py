@@ -0,0 +1,26 @@
+from rag.embeddings import (
+    DEFAULT_OPENAI_MODEL,
+    HashingEmbeddingFunction,
+    OpenAIEmbeddingFunction,
+    get_embedding_function,
+)
+
+
+def test_default_openai_model_keeps_ada_collection():
+    emb = OpenAIEmbeddingFunction(use_cache=False)
+    assert emb.model == DEFAULT_OPENAI_MODEL
+    assert emb.collection_name == "ada"
+
+
+def test_openai_model_override_gets_own_collection(monkeypatch):
+    monkeypatch.setenv("EMBEDDING_MODEL", "text-embedding-3-large")
+    emb = get_embedding_function("openai")
+    assert emb.model == "text-embedding-3-large"
+    assert emb.collection_name != "ada"
+    assert emb.collection_name != OpenAIEmbeddingFunction(use_cache=False).collection_name
+
+
+def test_different_dims_map_to_different_collections():
+    small, large = HashingEmbeddingFunction(dim=16), HashingEmbeddingFunction(dim=24)
+    assert len(small(["insulin dose"])[0]) != len(large(["insulin dose"])[0])
+    assert small.collection_name != large.collection_name